@@ -0,0 +1,69 @@
+import argparse
+import glob
+import time
+from libraries.enums import ConnectionCriterion
+from libraries.utils import get_instance_id, import_mapf_instance
+from libraries.clique_index import DEFAULT_MAX_CLIQUES, DEFAULT_MIN_CLIQUE_SIZE, build_clique_index, get_clique_index_path, save_clique_index
+from libraries.connectivity_graph_cache import DEFAULT_CACHE_SIZE, cache_connectivity_graph, get_cached_connectivity_graph
+from libraries.connectivity_graphs import generate_connectivity_graph, import_connectivity_graph, import_connectivity_graph_binary, is_binary_connectivity_graph_current
+
+def index_instance(file: str, args: list, indexed_paths: set[str]) -> None:
+    # instances sharing the same generated graph share the same index, which is built once
+    map, _, _ = import_mapf_instance(file)
+    file_id = get_instance_id(file)
+    path = get_clique_index_path(map, file_id, args)
+    if path in indexed_paths:
+        print("Same connectivity graph as an instance already indexed: " + file + "\n")
+        return
+    indexed_paths.add(path)
+    print("Indexing cliques for " + file)
+
+    start_time = time.time()
+
+    # the indexed graph is the same the solver uses, with the same arguments
+    connectivity_graph = None
+    if args.connectivity_graph:
+        if args.cache_size > 0:
+            connectivity_graph = get_cached_connectivity_graph(map, args.connection_criterion, args.connection_distance)
+        if connectivity_graph is None:
+            connectivity_graph = generate_connectivity_graph(map, args)
+            if args.cache_size > 0:
+                cache_connectivity_graph(connectivity_graph, map, args.connection_criterion, args.connection_distance, args.cache_size)
+    else:
+        bin_path = "./connectivity_graphs/" + file_id + ".bin"
+        txt_path = "./connectivity_graphs/" + file_id + ".txt"
+        if is_binary_connectivity_graph_current(bin_path, txt_path):
+            connectivity_graph = import_connectivity_graph_binary(bin_path)
+        else:
+            connectivity_graph = import_connectivity_graph(txt_path)
+
+    clique_index = build_clique_index(connectivity_graph, len(map), len(map[0]), args.min_clique_size, args.max_cliques)
+    save_clique_index(clique_index, path)
+
+    CPU_time = time.time() - start_time
+    print("Maximal cliques: " + str(len(clique_index['offsets']) - 1) + ("" if clique_index['complete'] else " (index not complete)"))
+    print("Index: " + path)
+    print("Total time (s):    {:.2f}\n".format(CPU_time))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Clique index generator, to look up goal positions instead of searching them')
+    parser.add_argument('--instance', type=str, default=None, required=True,
+                        help='The name of the instance file(s) whose map must be indexed')
+    parser.add_argument('--connectivity_graph', type=bool, default=False,
+                        help='Decide to index a generated connectivity graph for the instance instead of the one already generated, as in the solver, defaults to ' + str(False))
+    parser.add_argument('--connection_criterion', type=str, default=ConnectionCriterion.PATH_LENGTH.name, choices=[ConnectionCriterion.NONE.name, ConnectionCriterion.DISTANCE.name, ConnectionCriterion.PATH_LENGTH.name],
+                        help='The connection definition used to generate a connectivity graph, defaults to ' + ConnectionCriterion.PATH_LENGTH.name)
+    parser.add_argument('--connection_distance', type=float, default=3,
+                        help='The distance used to define a connection, when using connection criteria based on distance between nodes, defaults to ' + str(3))
+    parser.add_argument('--min_clique_size', type=int, default=DEFAULT_MIN_CLIQUE_SIZE,
+                        help='The minimum number of nodes of the indexed maximal cliques, defaults to ' + str(DEFAULT_MIN_CLIQUE_SIZE))
+    parser.add_argument('--max_cliques', type=int, default=DEFAULT_MAX_CLIQUES,
+                        help='The maximum number of maximal cliques in an index, defaults to ' + str(DEFAULT_MAX_CLIQUES))
+    parser.add_argument('--cache_size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help='Maximum size (MB) of the cache of generated connectivity graphs, 0 disables it, defaults to ' + str(DEFAULT_CACHE_SIZE))
+
+    args = parser.parse_args()
+
+    indexed_paths = set()
+    for file in sorted(glob.glob(args.instance)):
+        index_instance(file, args, indexed_paths)
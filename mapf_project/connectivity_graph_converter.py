@@ -0,0 +1,39 @@
+import argparse
+import glob
+import os
+import time
+from libraries.enums import ConnectionCriterion
+from libraries.utils import import_mapf_instance, get_instance_id
+from libraries.connectivity_graphs import import_connectivity_graph, save_connectivity_graph_binary
+
+def convert_instance(file: str, args: list) -> None:
+    # text files don't record map dimensions, connection criterion and distance:
+    # dimensions are read from the instance, criterion and distance must be given by the user
+    file_id = get_instance_id(file)
+    txt_path = "./connectivity_graphs/" + file_id + ".txt"
+    bin_path = "./connectivity_graphs/" + file_id + ".bin"
+    print("Converting " + txt_path)
+
+    start_time = time.time()
+
+    map, _, _ = import_mapf_instance(file)
+    connectivity_graph = import_connectivity_graph(txt_path)
+    save_connectivity_graph_binary(connectivity_graph, len(map), len(map[0]), args.connection_criterion, args.connection_distance, bin_path)
+
+    CPU_time = time.time() - start_time
+    print("Size (bytes):    " + str(os.path.getsize(txt_path)) + " -> " + str(os.path.getsize(bin_path)))
+    print("Total time (s):    {:.2f}".format(CPU_time))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Connectivity graph converter, from text files to binary files')
+    parser.add_argument('--instance', type=str, default=None, required=True,
+                        help='The name of the instance file(s) whose connectivity graph must be converted')
+    parser.add_argument('--connection_criterion', type=str, default=None, required=True, choices=[ConnectionCriterion.NONE.name, ConnectionCriterion.DISTANCE.name, ConnectionCriterion.PATH_LENGTH.name],
+                        help='The connection definition used to generate the connectivity graph(s), recorded in the binary file(s)')
+    parser.add_argument('--connection_distance', type=float, default=None, required=True,
+                        help='The distance used to generate the connectivity graph(s), recorded in the binary file(s)')
+
+    args = parser.parse_args()
+
+    for file in sorted(glob.glob(args.instance)):
+        convert_instance(file, args)
@@ -1,30 +1,98 @@
 import argparse
+import concurrent.futures
 import glob
-import multiprocessing
+import json
+import os
 import time
 import sys
 from libraries.enums import ConnectionCriterion
-from libraries.utils import import_mapf_instance
-from libraries.connectivity_graphs import generate_connectivity_graph, save_connectivity_graph
+from libraries.utils import import_mapf_instance, get_instance_id
+from libraries.connectivity_graph_cache import DEFAULT_CACHE_SIZE, cache_connectivity_graph, get_cached_connectivity_graph
+from libraries.connectivity_graphs import generate_connectivity_graph, generate_connectivity_graph_parallel, get_toggled_cells, import_connectivity_graph, import_connectivity_graph_binary, repair_connectivity_graph, save_connectivity_graph, save_connectivity_graph_binary
 
-def manage_instance(file: str, args: list) -> None:
+# connection criterion and distance used to build each text connectivity graph (binary files record them in their header)
+MANIFEST_PATH = "./connectivity_graphs/manifest.json"
+
+def get_output_path(file: str, args: list) -> str:
+    file_id = get_instance_id(file)
+    if (args.binary):
+        return "./connectivity_graphs/" + file_id + ".bin"
+    return "./connectivity_graphs/" + file_id + ".txt"
+
+def import_manifest() -> dict:
+    if not os.path.isfile(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH, 'r') as f:
+        return json.load(f)
+
+def save_manifest(manifest: dict) -> None:
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+def is_up_to_date(file: str, args: list, manifest: dict) -> bool:
+    # a connectivity graph is up to date if it is newer than its instance and it was built with the same criterion and distance
+    path = get_output_path(file, args)
+    if not os.path.isfile(path) or os.path.getmtime(path) < os.path.getmtime(file):
+        return False
+
+    if (args.binary):
+        connectivity_graph = import_connectivity_graph_binary(path)
+        criterion = connectivity_graph.criterion
+        connection_distance = connectivity_graph.connection_distance
+    else:
+        entry = manifest.get(os.path.basename(path))
+        if entry is None:
+            return False
+        criterion = entry["connection_criterion"]
+        connection_distance = entry["connection_distance"]
+
+    return criterion == args.connection_criterion and connection_distance == args.connection_distance
+
+def manage_instance(file: str, args: list) -> tuple[str, int, float]:
+    # returns the instance file, the number of nodes (free cells) of its map and the generation time
     sys.stdout = sys.__stdout__
     print("Generating connectivity graph for " + file)
-    file_name_sections = file.split("\\")
-    file_id = file_name_sections[-1].split(".")[0]
-    path = "./connectivity_graphs/" + file_id + ".txt"
+    path = get_output_path(file, args)
 
     start_time = time.time()
 
     map, _, _ = import_mapf_instance(file)
 
-    connectivity_graph = generate_connectivity_graph(map, args)
+    # a graph already generated for the same map, criterion and distance is taken from the cache
+    connectivity_graph = None
+    if args.cache_size > 0:
+        connectivity_graph = get_cached_connectivity_graph(map, args.connection_criterion, args.connection_distance)
+    cached_connectivity_graph = connectivity_graph
+    if connectivity_graph is not None:
+        print("Connectivity graph found in cache")
+    elif (args.patch) and os.path.isfile(path):
+        # the existing connectivity graph is repaired, only around the cells which have been edited
+        if (args.binary):
+            old_connectivity_graph = import_connectivity_graph_binary(path)
+        else:
+            old_connectivity_graph = import_connectivity_graph(path)
+        toggled_cells = get_toggled_cells(map, old_connectivity_graph)
+        print("Toggled cells: " + str(toggled_cells))
+        connectivity_graph = repair_connectivity_graph(map, old_connectivity_graph, toggled_cells, args)
+    elif args.workers > 1:
+        connectivity_graph, shard_timings = generate_connectivity_graph_parallel(map, args, args.workers)
+        for first_row, last_row, num_of_nodes, shard_time in shard_timings:
+            print("Shard (rows " + str(first_row) + "-" + str(last_row) + ", " + str(num_of_nodes) + " nodes) time (s):    {:.2f}".format(shard_time))
+    else:
+        connectivity_graph = generate_connectivity_graph(map, args)
 
-    save_connectivity_graph(connectivity_graph, path)
+    if (args.binary):
+        save_connectivity_graph_binary(connectivity_graph, len(map), len(map[0]), args.connection_criterion, args.connection_distance, path)
+    else:
+        save_connectivity_graph(connectivity_graph, path)
+    if args.cache_size > 0 and connectivity_graph is not cached_connectivity_graph:
+        cache_connectivity_graph(connectivity_graph, map, args.connection_criterion, args.connection_distance, args.cache_size)
 
     CPU_time = time.time() - start_time
     print("Total time (s):    {:.2f}".format(CPU_time))
 
+    return file, len(connectivity_graph), CPU_time
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Connectivity graph generator')
     parser.add_argument('--instance', type=str, default=None, required=True,
@@ -33,10 +101,50 @@ if __name__ == '__main__':
                         help='The connection definition used to generate a connectivity graph, defaults to ' + ConnectionCriterion.PATH_LENGTH.name)
     parser.add_argument('--connection_distance', type=float, default=3,
                         help='The distance used to define a connection, when using connection criteria based on distance between nodes, defaults to ' + str(3))
+    parser.add_argument('--workers', type=int, default=1,
+                        help='The number of processes used to generate each PATH_LENGTH connectivity graph (the others are always generated by a single process), defaults to ' + str(1))
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='The number of instances processed at the same time, defaults to ' + str(1))
+    parser.add_argument('--force', type=bool, default=False,
+                        help='Decide to regenerate connectivity graphs which are already up to date, defaults to ' + str(False))
+    parser.add_argument('--patch', type=bool, default=False,
+                        help='Decide to repair existing connectivity graphs after obstacle edits, instead of rebuilding them, defaults to ' + str(False))
+    parser.add_argument('--cache_size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help='Maximum size (MB) of the cache of generated connectivity graphs, shared with the solver, 0 disables it, defaults to ' + str(DEFAULT_CACHE_SIZE))
+    parser.add_argument('--binary', type=bool, default=False,
+                        help='Decide to save the connectivity graph(s) in the binary format instead of text files, defaults to ' + str(False))
 
     args = parser.parse_args()
 
+    manifest = import_manifest()
+
+    # connectivity graphs newer than their instance, and built with the same criterion and distance, are skipped
+    files = []
+    skipped = 0
     for file in sorted(glob.glob(args.instance)):
-        instance = multiprocessing.Process(target=manage_instance, name="Solve instance", args=(file, args))
-        instance.start()
-        instance.join()
\ No newline at end of file
+        if (not args.force) and is_up_to_date(file, args, manifest):
+            skipped += 1
+        else:
+            files.append(file)
+    print("Instances to process: " + str(len(files)) + ", up to date (skipped): " + str(skipped) + "\n")
+
+    start_time = time.time()
+    total_nodes = 0
+    completed = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        instances = [executor.submit(manage_instance, file, args) for file in files]
+        for instance in concurrent.futures.as_completed(instances):
+            file, num_of_nodes, _ = instance.result()
+            manifest[os.path.basename(get_output_path(file, args))] = {"connection_criterion": args.connection_criterion, "connection_distance": args.connection_distance}
+            save_manifest(manifest)
+
+            completed += 1
+            total_nodes += num_of_nodes
+            elapsed_time = time.time() - start_time
+            print("Progress: " + str(completed) + "/" + str(len(files)) + " instances, {:.0f} cells/s\n".format(total_nodes / max(elapsed_time, 1e-9)))
+
+    elapsed_time = time.time() - start_time
+    print("Generated: " + str(completed) + ", skipped: " + str(skipped))
+    print("Cells processed: " + str(total_nodes))
+    print("Total time (s):    {:.2f}".format(elapsed_time))
+    print("Throughput (cells/s):    {:.0f}".format(total_nodes / max(elapsed_time, 1e-9)))
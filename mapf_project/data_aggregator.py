@@ -22,6 +22,9 @@ def aggregate_data() -> None:
     for filename in os.listdir("./outputs/"):
         path = "./outputs/" + filename
         specs = filename.split("_test_")[0]
+        # the number of cliques is only collected together with exact optimality values (sampled runs print estimates instead),
+        # so that they can be charted against each other
+        cliques_found = None
         with open(path, 'r') as f:
             while True:
                 line = f.readline()
@@ -29,10 +32,11 @@ def aggregate_data() -> None:
                     break
                 if "Cliques found" in line:
                     elements = line.split(": ")
-                    number_of_cliques.append(specs + ":" + elements[1].strip())
+                    cliques_found = elements[1].strip()
                 if "Uninformed clique generation optimality" in line:
                     elements = line.split(": ")
                     uninformed_optimality_values.append(specs + ":" + elements[1].strip())
+                    number_of_cliques.append(specs + ":" + cliques_found)
                 if "Informed clique generation optimality" in line:
                     elements = line.split(": ")
                     informed_optimality_values.append(specs + ":" + elements[1].strip())
@@ -0,0 +1,156 @@
+from .enums import AssignmentBackend
+import munkres
+import numpy as np
+
+'''
+    assignment solvers take square cost matrices (rows are agents, columns are goals),
+    and return, for each row, the column assigned to it in an assignment with minimum total cost
+    the Jonker-Volgenant solver is the default one, the munkres one is kept as a reference
+'''
+
+def solve_assignment(cost_matrix: list[list[int]], backend: str = AssignmentBackend.JONKER_VOLGENANT.name) -> list[int]:
+    return solve_assignments(np.array([cost_matrix], dtype=np.float64).reshape(1, len(cost_matrix), len(cost_matrix)), backend)[0].tolist()
+
+def solve_assignments(cost_matrices: np.ndarray, backend: str = AssignmentBackend.JONKER_VOLGENANT.name) -> np.ndarray:
+    # cost_matrices is a (number of problems x n x n) array, returns a (number of problems x n) array of assigned columns
+    if backend == AssignmentBackend.JONKER_VOLGENANT.name:
+        # a single problem is solved without the overhead of the batch bookkeeping
+        if len(cost_matrices) == 1:
+            return solve_assignment_jonker_volgenant(cost_matrices[0])[None, :]
+        return solve_assignments_jonker_volgenant(cost_matrices)
+    elif backend == AssignmentBackend.MUNKRES.name:
+        return np.array([solve_assignment_munkres(cost_matrix) for cost_matrix in cost_matrices], dtype=np.int64).reshape(cost_matrices.shape[:2])
+    else:
+        raise RuntimeError("Unknown assignment backend: " + backend)
+
+def solve_assignment_munkres(cost_matrix: np.ndarray) -> list[int]:
+    assignment = [0] * len(cost_matrix)
+    for row, col in munkres.Munkres().compute(cost_matrix.tolist()):
+        assignment[row] = col
+    return assignment
+
+def solve_assignment_jonker_volgenant(cost_matrix: np.ndarray) -> np.ndarray:
+    # shortest augmenting path version of the Jonker-Volgenant algorithm (as described by Crouse), with dual variables u (rows) and v (columns):
+    # rows are assigned one at a time, along the shortest path of reduced costs from the new row to a free column (Dijkstra)
+    n = len(cost_matrix)
+    u = np.zeros(n)
+    v = np.zeros(n)
+    col4row = np.full(n, -1, dtype=np.int64)
+    row4col = np.full(n, -1, dtype=np.int64)
+
+    for current_row in range(n):
+        shortest_path_costs = np.full(n, np.inf)
+        path = np.full(n, -1, dtype=np.int64)
+        visited_rows = [current_row]
+        # the columns not visited yet
+        remaining = np.arange(n)
+        row = current_row
+        min_cost = 0.0
+        while True:
+            # the reduced costs of the edges from the last row reached improve the paths to the columns not visited yet
+            reduced_costs = min_cost + cost_matrix[row, remaining] - u[row] - v[remaining]
+            improved = reduced_costs < shortest_path_costs[remaining]
+            shortest_path_costs[remaining[improved]] = reduced_costs[improved]
+            path[remaining[improved]] = row
+
+            # the closest column not visited yet is reached next, free columns first on ties
+            costs = shortest_path_costs[remaining]
+            k = costs.argmin()
+            min_cost = costs[k]
+            if min_cost == np.inf:
+                raise RuntimeError("The assignment problem is infeasible")
+            closest_free = np.nonzero((costs == min_cost) & (row4col[remaining] == -1))[0]
+            if len(closest_free) > 0:
+                k = closest_free[0]
+            col = remaining[k]
+            remaining = np.delete(remaining, k)
+            if row4col[col] == -1:
+                break
+            row = row4col[col]
+            visited_rows.append(row)
+
+        # the dual variables are updated, so that reduced costs stay non-negative
+        u[current_row] += min_cost
+        other_rows = np.array(visited_rows[1:], dtype=np.int64)
+        u[other_rows] += min_cost - shortest_path_costs[col4row[other_rows]]
+        visited_cols = np.setdiff1d(np.arange(n), remaining, assume_unique=True)
+        v[visited_cols] -= min_cost - shortest_path_costs[visited_cols]
+
+        # the assignments along the path are flipped, from the free column back to the current row
+        while True:
+            row = path[col]
+            row4col[col] = row
+            col4row[row], col = col, col4row[row]
+            if row == current_row:
+                break
+
+    return col4row
+
+def solve_assignments_jonker_volgenant(cost_matrices: np.ndarray) -> np.ndarray:
+    # same algorithm as solve_assignment_jonker_volgenant, with all the problems solved in lockstep:
+    # each step works on the columns of all the problems whose path is not complete yet
+    num_of_problems, n, _ = cost_matrices.shape
+    problems = np.arange(num_of_problems)
+    u = np.zeros((num_of_problems, n))
+    v = np.zeros((num_of_problems, n))
+    col4row = np.full((num_of_problems, n), -1, dtype=np.int64)
+    row4col = np.full((num_of_problems, n), -1, dtype=np.int64)
+
+    for current_row in range(n):
+        shortest_path_costs = np.full((num_of_problems, n), np.inf)
+        path = np.full((num_of_problems, n), -1, dtype=np.int64)
+        visited_rows = np.zeros((num_of_problems, n), dtype=bool)
+        visited_cols = np.zeros((num_of_problems, n), dtype=bool)
+        rows = np.full(num_of_problems, current_row, dtype=np.int64)
+        min_costs = np.zeros(num_of_problems)
+        sinks = np.full(num_of_problems, -1, dtype=np.int64)
+
+        active = problems
+        while len(active) > 0:
+            active_rows = rows[active]
+            visited_rows[active, active_rows] = True
+
+            # the reduced costs of the edges from the last row reached improve the paths to the columns not visited yet
+            reduced_costs = min_costs[active, None] + cost_matrices[active, active_rows] - u[active, active_rows, None] - v[active]
+            improved = ~visited_cols[active] & (reduced_costs < shortest_path_costs[active])
+            shortest_path_costs[active] = np.where(improved, reduced_costs, shortest_path_costs[active])
+            path[active] = np.where(improved, active_rows[:, None], path[active])
+
+            # the closest column not visited yet is reached next, free columns first on ties
+            costs = np.where(visited_cols[active], np.inf, shortest_path_costs[active])
+            lowest_costs = costs.min(axis=1)
+            if np.isinf(lowest_costs).any():
+                raise RuntimeError("The assignment problem is infeasible")
+            closest = costs == lowest_costs[:, None]
+            free_closest = closest & (row4col[active] == -1)
+            cols = np.where(free_closest.any(axis=1), free_closest.argmax(axis=1), closest.argmax(axis=1))
+
+            min_costs[active] = lowest_costs
+            visited_cols[active, cols] = True
+            next_rows = row4col[active, cols]
+            done = next_rows == -1
+            sinks[active[done]] = cols[done]
+            rows[active[~done]] = next_rows[~done]
+            active = active[~done]
+
+        # the dual variables are updated, so that reduced costs stay non-negative
+        u[:, current_row] += min_costs
+        other_rows = visited_rows.copy()
+        other_rows[:, current_row] = False
+        assigned_cols_costs = np.take_along_axis(shortest_path_costs, np.maximum(col4row, 0), axis=1)
+        u += np.where(other_rows, min_costs[:, None] - assigned_cols_costs, 0)
+        v -= np.where(visited_cols, min_costs[:, None] - shortest_path_costs, 0)
+
+        # the assignments along the path are flipped, from the free column back to the current row
+        cols = sinks
+        active = problems
+        while len(active) > 0:
+            path_rows = path[active, cols]
+            row4col[active, cols] = path_rows
+            previous_cols = col4row[active, path_rows]
+            col4row[active, path_rows] = cols
+            not_done = path_rows != current_row
+            active = active[not_done]
+            cols = previous_cols[not_done]
+
+    return col4row
@@ -155,10 +155,11 @@ def disjoint_splitting(collision):
 class CBSSolver(object):
     """The high-level search of CBS."""
 
-    def __init__(self, my_map, starts, goals):
+    def __init__(self, my_map, starts, goals, heuristics=None):
         """my_map   - list of lists specifying obstacle positions
         starts      - [(x1, y1), (x2, y2), ...] list of start locations
         goals       - [(x1, y1), (x2, y2), ...] list of goal locations
+        heuristics  - [h_values1, h_values2, ...] optional heuristics tables of the goals
         """
 
         self.my_map = my_map
@@ -174,9 +175,13 @@ class CBSSolver(object):
         self.open_list = []
 
         # compute heuristics for the low-level search
-        self.heuristics = []
-        for goal in self.goals:
-            self.heuristics.append(compute_heuristics(my_map, goal))
+        # heuristics already computed can be given instead (this part of code was added)
+        if heuristics is not None:
+            self.heuristics = heuristics
+        else:
+            self.heuristics = []
+            for goal in self.goals:
+                self.heuristics.append(compute_heuristics(my_map, goal))
 
     def push_node(self, node):
         heapq.heappush(self.open_list, (node['cost'], len(node['collisions']), self.num_of_generated, node))
@@ -0,0 +1,65 @@
+from .connectivity_graph_cache import get_connectivity_graph_key
+from .connectivity_graphs import generate_maximal_cliques
+import numpy as np
+import os
+
+'''
+    a clique index holds the maximal cliques of the connectivity graph of a map, so that goal positions for any set of starts
+    can be looked up instead of searched: every clique of k nodes is part of (at least) one maximal clique with k or more nodes
+    cliques are stored in CSR form (offsets and node cell indices, cell = row * cols + col), with their centroid (x, y)
+    and bounding box (min x, min y, max x, max y)
+    an index refers to the connectivity graph the solver uses: the one imported from the instance's file in connectivity_graphs/,
+    or, for generated graphs, the one keyed by the map obstacles plus criterion and distance, like cached connectivity graphs
+'''
+
+CLIQUE_INDEX_DIRECTORY = "./clique_indexes/"
+DEFAULT_MIN_CLIQUE_SIZE = 2
+DEFAULT_MAX_CLIQUES = 100000
+
+def get_clique_index_path(map: list[list[bool]], file_id: str, args: list) -> str:
+    if args.connectivity_graph:
+        return CLIQUE_INDEX_DIRECTORY + get_connectivity_graph_key(map, args.connection_criterion, args.connection_distance) + ".npz"
+    return CLIQUE_INDEX_DIRECTORY + file_id + ".npz"
+
+def build_clique_index(connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], rows: int, cols: int, min_clique_size: int = DEFAULT_MIN_CLIQUE_SIZE, max_cliques: int = DEFAULT_MAX_CLIQUES) -> dict[str, np.ndarray]:
+    # maximal cliques with less than min_clique_size nodes are left out
+    # if there are more than max_cliques maximal cliques, only the first ones found are kept and the index is not complete
+    offsets = [0]
+    nodes = []
+    complete = True
+    for clique in generate_maximal_cliques(connectivity_graph, min_clique_size):
+        if len(offsets) > max_cliques:
+            complete = False
+            break
+        nodes.extend(y * cols + x for x, y in clique)
+        offsets.append(len(nodes))
+
+    offsets = np.array(offsets, dtype=np.int64)
+    nodes = np.array(nodes, dtype=np.int64)
+    clique_ids = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    xs = nodes % cols
+    ys = nodes // cols
+    sizes = np.maximum(np.diff(offsets), 1)
+
+    centroids = np.stack([np.bincount(clique_ids, weights=xs, minlength=len(sizes)) / sizes,
+                          np.bincount(clique_ids, weights=ys, minlength=len(sizes)) / sizes], axis=1)
+    bounding_boxes = np.zeros((len(offsets) - 1, 4), dtype=np.int64)
+    if len(nodes) > 0:
+        bounding_boxes[:, 0] = np.minimum.reduceat(xs, offsets[:-1])
+        bounding_boxes[:, 1] = np.minimum.reduceat(ys, offsets[:-1])
+        bounding_boxes[:, 2] = np.maximum.reduceat(xs, offsets[:-1])
+        bounding_boxes[:, 3] = np.maximum.reduceat(ys, offsets[:-1])
+
+    return {'rows': np.array(rows), 'cols': np.array(cols), 'min_clique_size': np.array(min_clique_size), 'complete': np.array(complete),
+            'offsets': offsets, 'nodes': nodes, 'centroids': centroids, 'bounding_boxes': bounding_boxes}
+
+def save_clique_index(clique_index: dict[str, np.ndarray], path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, **clique_index)
+
+def import_clique_index(filename: str) -> dict[str, np.ndarray]:
+    if not os.path.isfile(filename):
+        raise RuntimeError("Clique index " + filename + " does not exist, generate it with clique_index_generator.py")
+    with np.load(filename) as clique_index:
+        return {key: clique_index[key] for key in clique_index.files}
@@ -0,0 +1,70 @@
+from .connectivity_graphs import CSRConnectivityGraph, import_connectivity_graph_binary, save_connectivity_graph_binary
+import hashlib
+import os
+
+'''
+    connectivity graphs are cached on disk, in the binary format, keyed by a hash of the map obstacles plus criterion and distance,
+    therefore the same graph is shared by all instances with the same map, whatever their file name is
+    the cache has a maximum size: when it is exceeded, least recently used graphs are removed
+'''
+
+CACHE_DIRECTORY = "./connectivity_graph_cache/"
+DEFAULT_CACHE_SIZE = 256
+
+def get_connectivity_graph_key(map: list[list[bool]], criterion: str, connection_distance: float) -> str:
+    content = str(len(map)) + " " + str(len(map[0])) + " " + criterion + " " + repr(float(connection_distance)) + "\n"
+    for row in map:
+        content += "".join(['@' if cell else '.' for cell in row]) + "\n"
+    return hashlib.sha256(content.encode()).hexdigest()
+
+def get_cached_connectivity_graph(map: list[list[bool]], criterion: str, connection_distance: float) -> CSRConnectivityGraph:
+    # returns None if the graph is not in the cache
+    path = CACHE_DIRECTORY + get_connectivity_graph_key(map, criterion, connection_distance) + ".bin"
+    if not os.path.isfile(path):
+        return None
+
+    try:
+        # the modification time records the last use
+        os.utime(path)
+        return import_connectivity_graph_binary(path)
+    except FileNotFoundError:
+        # the graph has been evicted in the meantime
+        return None
+
+def cache_connectivity_graph(connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], map: list[list[bool]], criterion: str, connection_distance: float, cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+    # cache_size is in MB
+    os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+    path = CACHE_DIRECTORY + get_connectivity_graph_key(map, criterion, connection_distance) + ".bin"
+
+    # the graph is written to a temporary file and then renamed, so that concurrent readers never see a partial file
+    temp_path = path + "." + str(os.getpid()) + ".tmp"
+    save_connectivity_graph_binary(connectivity_graph, len(map), len(map[0]), criterion, connection_distance, temp_path)
+    os.replace(temp_path, path)
+
+    evict_connectivity_graphs(cache_size)
+
+def evict_connectivity_graphs(cache_size: int) -> None:
+    # removes least recently used graphs until the cache fits in cache_size MB
+    max_size = cache_size * 1024 * 1024
+
+    entries = []
+    total_size = 0
+    for filename in os.listdir(CACHE_DIRECTORY):
+        if not filename.endswith(".bin"):
+            continue
+        try:
+            stat = os.stat(CACHE_DIRECTORY + filename)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, filename))
+        total_size += stat.st_size
+
+    entries.sort()
+    for _, size, filename in entries:
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(CACHE_DIRECTORY + filename)
+        except FileNotFoundError:
+            pass
+        total_size -= size
@@ -3,9 +3,14 @@ from .enums import ConnectionCriterion
 from .single_agent_planner import compute_heuristics
 from .utils import get_euclidean_distance, get_shortest_path_length
 from pathlib import Path
-from itertools import combinations
+from collections import deque
+from collections.abc import Iterator, Mapping
+import multiprocessing
+import numpy as np
+import random
 import re
 import sys
+import time
 
 '''
     'map' and other data structures/functions associated with external libraries use (row, col) to identify nodes,
@@ -13,7 +18,272 @@ import sys
     therefore, when passing arguments to the former, the coordinates must be switched (row = y, col = x)
 '''
 
+# binary connectivity graph files: a header, followed by the CSR arrays (nodes, offsets, neighbors)
+# nodes are identified by their cell index (row * cols + col) and are sorted in row-major order
+BINARY_MAGIC = b"RMAPFCSR"
+BINARY_VERSION = 1
+BINARY_HEADER = np.dtype([('magic', 'S8'), ('version', '<u4'), ('rows', '<u4'), ('cols', '<u4'), ('criterion', '<u4'),
+                          ('connection_distance', '<f8'), ('num_of_nodes', '<u8'), ('num_of_edges', '<u8')])
+
+class ConnectivityGraph(dict):
+    # dict representation of a connectivity graph: keys are (x, y) nodes, values are lists of (x, y) nodes
+    # unlike a plain dict, it can cache data derived from the graph, which must not be modified afterwards
+    core_numbers = None
+    degeneracy_ordering = None
+
+class CSRConnectivityGraph(Mapping):
+    # read-only connectivity graph backed by CSR arrays, which can be memory-mapped from a binary file
+    # it behaves like the dict representation: keys are (x, y) nodes, values are lists of (x, y) nodes
+    core_numbers = None
+    degeneracy_ordering = None
+
+    def __init__(self, rows: int, cols: int, nodes: np.ndarray, offsets: np.ndarray, neighbors: np.ndarray, criterion: str, connection_distance: float):
+        self.rows = rows
+        self.cols = cols
+        self.nodes = nodes
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.criterion = criterion
+        self.connection_distance = connection_distance
+
+    def get_node_index(self, node: tuple[int, int]) -> int:
+        x, y = node
+        if x < 0 or x >= self.cols or y < 0 or y >= self.rows:
+            return -1
+        cell = y * self.cols + x
+        i = int(np.searchsorted(self.nodes, cell))
+        if i < len(self.nodes) and self.nodes[i] == cell:
+            return i
+        return -1
+
+    def __getitem__(self, node: tuple[int, int]) -> list[tuple[int, int]]:
+        i = self.get_node_index(node)
+        if i < 0:
+            raise KeyError(node)
+        cols = self.cols
+        return [(cell % cols, cell // cols) for cell in self.neighbors[self.offsets[i]:self.offsets[i + 1]].tolist()]
+
+    def __contains__(self, node: tuple[int, int]) -> bool:
+        return self.get_node_index(node) >= 0
+
+    def __iter__(self):
+        cols = self.cols
+        for cell in self.nodes.tolist():
+            yield (cell % cols, cell // cols)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+class LazyConnectivityGraph(Mapping):
+    # connectivity graph whose adjacency lists are computed the first time a node is accessed, then memoized
+    # it behaves like the dict representation: keys are (x, y) nodes, values are lists of (x, y) nodes
+
+    def __init__(self, map: list[list[bool]], criterion: str, connection_distance: float):
+        self.map = map
+        self.criterion = criterion
+        self.connection_distance = connection_distance
+        self.nodes = [(col, row) for row in range(len(map)) for col in range(len(map[0])) if map[row][col] == False]
+        self.node_set = set(self.nodes)
+        self.adjacency = {}
+        self.stencil = get_distance_stencil(connection_distance) if criterion == ConnectionCriterion.DISTANCE.name else None
+
+    def __getitem__(self, node: tuple[int, int]) -> list[tuple[int, int]]:
+        neighbors = self.adjacency.get(node)
+        if neighbors is None:
+            if node not in self.node_set:
+                raise KeyError(node)
+            neighbors = get_node_neighbors(self.map, node, self.criterion, self.connection_distance, self.stencil)
+            self.adjacency[node] = neighbors
+        return neighbors
+
+    def __contains__(self, node: tuple[int, int]) -> bool:
+        return node in self.node_set
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+class LazyReducedConnectivityGraph(Mapping):
+    # on demand version of get_reduced_connectivity_graph for lazy connectivity graphs:
+    # a node which can't be part of a clique of num_of_agents nodes, because of its own degree, has no neighbors,
+    # otherwise its neighbors are filtered by the same rule (a single reduction step, which only looks at nearby nodes)
+
+    def __init__(self, connectivity_graph: LazyConnectivityGraph, num_of_agents: int):
+        self.connectivity_graph = connectivity_graph
+        self.num_of_agents = num_of_agents
+        self.adjacency = {}
+
+    def __getitem__(self, node: tuple[int, int]) -> list[tuple[int, int]]:
+        neighbors = self.adjacency.get(node)
+        if neighbors is None:
+            neighbors = []
+            if len(self.connectivity_graph[node]) + 1 >= self.num_of_agents:
+                neighbors = [n for n in self.connectivity_graph[node] if len(self.connectivity_graph[n]) + 1 >= self.num_of_agents]
+            self.adjacency[node] = neighbors
+        return neighbors
+
+    def __contains__(self, node: tuple[int, int]) -> bool:
+        return node in self.connectivity_graph
+
+    def __iter__(self):
+        return iter(self.connectivity_graph)
+
+    def __len__(self) -> int:
+        return len(self.connectivity_graph)
+
+class ReducedConnectivityGraph(Mapping):
+    # read-only view of the nodes of a connectivity graph with core number >= min_core_number, and their connections
+    # the underlying graph is not modified
+
+    def __init__(self, connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], core_numbers: dict[tuple[int, int], int], min_core_number: int):
+        self.connectivity_graph = connectivity_graph
+        self.core_numbers = core_numbers
+        self.min_core_number = min_core_number
+        self.nodes = [node for node in connectivity_graph.keys() if core_numbers[node] >= min_core_number]
+        self.adjacency = {}
+
+    def __getitem__(self, node: tuple[int, int]) -> list[tuple[int, int]]:
+        neighbors = self.adjacency.get(node)
+        if neighbors is None:
+            if self.core_numbers.get(node, -1) < self.min_core_number:
+                raise KeyError(node)
+            neighbors = [n for n in self.connectivity_graph[node] if self.core_numbers[n] >= self.min_core_number]
+            self.adjacency[node] = neighbors
+        return neighbors
+
+    def __contains__(self, node: tuple[int, int]) -> bool:
+        return self.core_numbers.get(node, -1) >= self.min_core_number
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+class WindowedConnectivityGraph(Mapping):
+    # read-only view of the nodes of a connectivity graph inside a square window of the map, and their connections inside it
+    # the window is centered on (x, y) and spans half_size cells on each side, only the adjacency lists of its nodes are accessed
+
+    def __init__(self, connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], center: tuple[float, float], half_size: float):
+        self.connectivity_graph = connectivity_graph
+        self.center = center
+        self.half_size = half_size
+        self.nodes = [node for node in connectivity_graph.keys() if self.is_inside(node)]
+        self.node_set = set(self.nodes)
+        self.adjacency = {}
+
+    def is_inside(self, node: tuple[int, int]) -> bool:
+        return abs(node[0] - self.center[0]) <= self.half_size and abs(node[1] - self.center[1]) <= self.half_size
+
+    def __getitem__(self, node: tuple[int, int]) -> list[tuple[int, int]]:
+        neighbors = self.adjacency.get(node)
+        if neighbors is None:
+            if node not in self.node_set:
+                raise KeyError(node)
+            neighbors = [n for n in self.connectivity_graph[node] if self.is_inside(n)]
+            self.adjacency[node] = neighbors
+        return neighbors
+
+    def __contains__(self, node: tuple[int, int]) -> bool:
+        return node in self.node_set
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+class BitsetConnectivityGraph(Mapping):
+    # view of a connectivity graph where each adjacency list is stored as a bitset (a Python int):
+    # bit i is set if the node is connected to the i-th node of the graph
+    # bitsets are built from the underlying graph the first time each node is accessed, so lazy graphs stay lazy
+    # nodes can be given in a custom order (e.g. a degeneracy ordering), which is the order of the bits
+    # bitsets already computed (e.g. by another process) can be given too, then the underlying graph is not used
+
+    def __init__(self, connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], nodes: list[tuple[int, int]] = None, bits: list[int] = None):
+        self.connectivity_graph = connectivity_graph
+        self.nodes = list(connectivity_graph.keys()) if nodes is None else nodes
+        self.index = {self.nodes[i]: i for i in range(len(self.nodes))}
+        self.bits = [None] * len(self.nodes) if bits is None else bits
+
+    def get_bits(self, node: tuple[int, int]) -> int:
+        i = self.index[node]
+        bits = self.bits[i]
+        if bits is None:
+            neighbors = bytearray(len(self.nodes) // 8 + 1)
+            for n in self.connectivity_graph[node]:
+                j = self.index.get(n)
+                if j is not None:
+                    neighbors[j >> 3] |= 1 << (j & 7)
+            bits = int.from_bytes(neighbors, 'little')
+            self.bits[i] = bits
+        return bits
+
+    def get_node_bit(self, node: tuple[int, int]) -> int:
+        return 1 << self.index[node]
+
+    def get_nodes(self, bits: int) -> list[tuple[int, int]]:
+        # returns the nodes whose bits are set, in the graph order
+        nodes = []
+        while bits:
+            lowest_bit = bits & -bits
+            nodes.append(self.nodes[lowest_bit.bit_length() - 1])
+            bits ^= lowest_bit
+        return nodes
+
+    def get_degree(self, node: tuple[int, int]) -> int:
+        return self.get_bits(node).bit_count()
+
+    def are_connected(self, n1: tuple[int, int], n2: tuple[int, int]) -> bool:
+        return (self.get_bits(n1) >> self.index[n2]) & 1 == 1
+
+    def is_clique(self, nodes: list[tuple[int, int]]) -> bool:
+        mask = 0
+        for n in nodes:
+            mask |= self.get_node_bit(n)
+        for n in nodes:
+            if (self.get_bits(n) | self.get_node_bit(n)) & mask != mask:
+                return False
+        return True
+
+    def __getitem__(self, node: tuple[int, int]) -> list[tuple[int, int]]:
+        if node not in self.index:
+            raise KeyError(node)
+        return self.get_nodes(self.get_bits(node))
+
+    def __contains__(self, node: tuple[int, int]) -> bool:
+        return node in self.index
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+class SearchBudget:
+    # limits a search to a wall-clock time (s) and to a number of expansions, 0 means no limit
+    # once the budget is exceeded, searches stop and return what they have found so far
+
+    def __init__(self, time_limit: float = 0, max_expansions: int = 0):
+        self.time_limit = time_limit
+        self.max_expansions = max_expansions
+        self.start_time = time.time()
+        self.expansions = 0
+        self.exceeded = False
+
+    def expand(self) -> bool:
+        # counts an expansion, returns False if the budget is exceeded
+        self.expansions += 1
+        if (self.max_expansions > 0 and self.expansions > self.max_expansions) or (self.time_limit > 0 and time.time() - self.start_time > self.time_limit):
+            self.exceeded = True
+        return not self.exceeded
+
 def are_nodes_a_clique(nodes: list[tuple[int, int]], connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]]) -> bool:
+    if isinstance(connectivity_graph, BitsetConnectivityGraph):
+        return connectivity_graph.is_clique(nodes)
+
     for n1 in nodes:
         for n2 in nodes:
             if (n1 != n2) and (not n2 in connectivity_graph[n1]):
@@ -22,21 +292,282 @@ def are_nodes_a_clique(nodes: list[tuple[int, int]], connectivity_graph: dict[tu
     return True
 
 def find_all_cliques(connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], num_of_agents: int) -> list[list[tuple[int, int]]]:
-    cliques = []
+    return list(generate_cliques(connectivity_graph, num_of_agents))
 
-    connectivity_graph = get_reduced_connectivity_graph(connectivity_graph, num_of_agents)
+def generate_cliques(connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], clique_size: int) -> Iterator[list[tuple[int, int]]]:
+    # yields each clique of clique_size nodes exactly once, as a sorted list of nodes, without storing the cliques found
+    # nodes are searched in degeneracy order, and each node of a clique is chosen only among the candidates after the previous one
+    connectivity_graph = get_reduced_connectivity_graph(connectivity_graph, clique_size)
+    bitset_connectivity_graph = BitsetConnectivityGraph(connectivity_graph, get_degeneracy_ordering(connectivity_graph))
 
-    for k in connectivity_graph.keys():
-        for comb in combinations(connectivity_graph[k], num_of_agents - 1):
-            candidate = list(comb)
-            candidate.append(k)
-            candidate.sort()
-            if candidate in cliques:
-                continue
-            if are_nodes_a_clique(candidate, connectivity_graph):
-                cliques.append(candidate)
+    all_nodes = (1 << len(bitset_connectivity_graph)) - 1
+    for clique in generate_clique_extensions(bitset_connectivity_graph, [], all_nodes, clique_size):
+        yield sorted(clique)
+
+def generate_clique_extensions(bitset_connectivity_graph: BitsetConnectivityGraph, clique: list[tuple[int, int]], candidates: int, clique_size: int) -> Iterator[list[tuple[int, int]]]:
+    # candidates is the bitset of the nodes, after the last node of the clique, connected to all nodes of the clique
+    if len(clique) == clique_size:
+        yield clique
+        return
+    missing_nodes = clique_size - len(clique)
+
+    for node in bitset_connectivity_graph.get_nodes(candidates):
+        candidates ^= bitset_connectivity_graph.get_node_bit(node)
+        new_candidates = candidates & bitset_connectivity_graph.get_bits(node)
+        if new_candidates.bit_count() >= missing_nodes - 1:
+            yield from generate_clique_extensions(bitset_connectivity_graph, clique + [node], new_candidates, clique_size)
+        if candidates.bit_count() < missing_nodes:
+            break
+
+def generate_maximal_cliques(connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], min_clique_size: int = 1) -> Iterator[list[tuple[int, int]]]:
+    # yields each maximal clique with at least min_clique_size nodes exactly once, as a sorted list of nodes
+    # Bron-Kerbosch with pivoting, with the roots in degeneracy order (Eppstein, Loffler and Strash):
+    # the nodes before the root are excluded, those after the root are the candidates
+    connectivity_graph = get_reduced_connectivity_graph(connectivity_graph, max(min_clique_size, 1))
+    bitset_connectivity_graph = BitsetConnectivityGraph(connectivity_graph, get_degeneracy_ordering(connectivity_graph))
+
+    for i in range(len(bitset_connectivity_graph)):
+        root = bitset_connectivity_graph.nodes[i]
+        bits = bitset_connectivity_graph.get_bits(root)
+        candidates = bits >> (i + 1) << (i + 1)
+        excluded = bits & ((1 << i) - 1)
+        yield from generate_maximal_clique_extensions(bitset_connectivity_graph, [root], candidates, excluded, min_clique_size)
+
+def generate_maximal_clique_extensions(bitset_connectivity_graph: BitsetConnectivityGraph, clique: list[tuple[int, int]], candidates: int, excluded: int, min_clique_size: int) -> Iterator[list[tuple[int, int]]]:
+    # candidates and excluded are the bitsets of the nodes connected to all nodes of the clique, which can or can't be added to it
+    # the clique is maximal when no node is connected to all its nodes
+    if candidates == 0:
+        if excluded == 0 and len(clique) >= min_clique_size:
+            yield sorted(clique)
+        return
+    if len(clique) + candidates.bit_count() < min_clique_size:
+        return
+
+    # the pivot is the node (candidate or excluded) with most neighbors among candidates, only the candidates not connected to it are branched on
+    pivot = max(bitset_connectivity_graph.get_nodes(candidates | excluded), key=lambda node: (candidates & bitset_connectivity_graph.get_bits(node)).bit_count())
+    for node in bitset_connectivity_graph.get_nodes(candidates & ~bitset_connectivity_graph.get_bits(pivot)):
+        bits = bitset_connectivity_graph.get_bits(node)
+        yield from generate_maximal_clique_extensions(bitset_connectivity_graph, clique + [node], candidates & bits, excluded & bits, min_clique_size)
+        candidates ^= bitset_connectivity_graph.get_node_bit(node)
+        excluded |= bitset_connectivity_graph.get_node_bit(node)
+
+def count_cliques(connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], clique_size: int) -> int:
+    # returns the number of cliques of clique_size nodes, which are counted without being generated
+    if clique_size <= 0:
+        return 1
+    connectivity_graph = get_reduced_connectivity_graph(connectivity_graph, clique_size)
+    bitset_connectivity_graph = BitsetConnectivityGraph(connectivity_graph, get_degeneracy_ordering(connectivity_graph))
+
+    all_nodes = (1 << len(bitset_connectivity_graph)) - 1
+    return count_clique_extensions(bitset_connectivity_graph, all_nodes, clique_size)
+
+def count_clique_extensions(bitset_connectivity_graph: BitsetConnectivityGraph, candidates: int, missing_nodes: int) -> int:
+    # when one node is missing, each candidate completes a clique
+    # when the candidates are a clique themselves, any missing_nodes of them complete a clique
+    num_of_candidates = candidates.bit_count()
+    if missing_nodes == 1:
+        return num_of_candidates
+    if num_of_candidates < missing_nodes:
+        return 0
+    candidate_nodes = bitset_connectivity_graph.get_nodes(candidates)
+    if bitset_connectivity_graph.is_clique(candidate_nodes):
+        return math.comb(num_of_candidates, missing_nodes)
+
+    num_of_cliques = 0
+    for node in candidate_nodes:
+        candidates ^= bitset_connectivity_graph.get_node_bit(node)
+        new_candidates = candidates & bitset_connectivity_graph.get_bits(node)
+        if new_candidates.bit_count() >= missing_nodes - 1:
+            num_of_cliques += count_clique_extensions(bitset_connectivity_graph, new_candidates, missing_nodes - 1)
+        if candidates.bit_count() < missing_nodes:
+            break
+
+    return num_of_cliques
+
+def find_clique(bitset_connectivity_graph: BitsetConnectivityGraph, clique_size: int, ranked: bool = False, budget: SearchBudget = None) -> list[tuple[int, int]]:
+    # returns a clique of clique_size nodes, or [] if there isn't any (or if the budget is exceeded first), using Bron-Kerbosch with pivoting
+    # nodes are taken as roots in the order of the bitset view, and only the nodes after the root are its candidates,
+    # therefore each clique is found once, from its first node, instead of once for each permutation of its nodes
+    # with a degeneracy ordering, each root has at most (degeneracy of the graph) candidates
+    # if ranked, the order is a ranking (best node first) and candidates are tried in order, without pivoting,
+    # so the first clique found is the one built greedily by adding the best node that can still complete a clique
+    if clique_size <= 0:
+        return []
+
+    later_nodes = (1 << len(bitset_connectivity_graph)) - 1
+    for i in range(len(bitset_connectivity_graph)):
+        later_nodes ^= 1 << i
+        root = bitset_connectivity_graph.nodes[i]
+        candidates = bitset_connectivity_graph.get_bits(root) & later_nodes
+        clique = extend_clique(bitset_connectivity_graph, [root], candidates, clique_size, ranked, budget)
+        if clique is not None:
+            return clique
+        if budget is not None and budget.exceeded:
+            break
+
+    return []
+
+def find_clique_parallel(bitset_connectivity_graph: BitsetConnectivityGraph, clique_size: int, ranked: bool, workers: int, budget: SearchBudget = None) -> list[tuple[int, int]]:
+    # same search as find_clique, with the roots split among a pool of workers: each clique is found from its first node only,
+    # so the searches from different roots are independent, and the bitsets are shared read-only by the workers
+    # without a ranking, workers stop as soon as any of them finds a clique (which may differ from the one find_clique returns)
+    # with a ranking, workers share the index of the first root from which a clique has been found, and stop searching later roots:
+    # the clique returned is the same as find_clique
+    # lazy graphs are searched by find_clique, since all bitsets are needed before the search starts
+    # time and expansions limits apply to each worker
+    if clique_size <= 0 or workers <= 1 or isinstance(bitset_connectivity_graph.connectivity_graph, LazyReducedConnectivityGraph):
+        return find_clique(bitset_connectivity_graph, clique_size, ranked, budget)
+
+    bits = [bitset_connectivity_graph.get_bits(node) for node in bitset_connectivity_graph.nodes]
+    num_of_nodes = len(bits)
+
+    # roots are split in small chunks, taken in order, so that the first roots (the best ranked ones) are searched first
+    chunk_size = max(1, num_of_nodes // (workers * 16))
+    chunks = [range(i, min(i + chunk_size, num_of_nodes)) for i in range(0, num_of_nodes, chunk_size)]
+
+    if budget is None:
+        budget = SearchBudget()
+    stop_event = multiprocessing.Event()
+    first_root = multiprocessing.Value('q', num_of_nodes)
+    clique = []
+    clique_root = num_of_nodes
+    with multiprocessing.Pool(workers, initializer=init_clique_worker, initargs=(bitset_connectivity_graph.nodes, bits, clique_size, ranked, budget, stop_event, first_root)) as pool:
+        for root_index, root_clique, expansions, exceeded in pool.imap_unordered(find_clique_from_roots, chunks):
+            budget.expansions += expansions
+            budget.exceeded = budget.exceeded or exceeded
+            if root_clique != [] and root_index < clique_root:
+                clique = root_clique
+                clique_root = root_index
+                if not ranked:
+                    break
+
+    return clique
+
+class CliqueWorkerBudget(SearchBudget):
+    # budget of a worker of find_clique_parallel: the search from a root is also cancelled when it can't change the result anymore
+
+    def __init__(self, time_limit: float, max_expansions: int, start_time: float):
+        super().__init__(time_limit, max_expansions)
+        self.start_time = start_time
+        self.root_index = 0
+        self.cancelled = False
+
+    def expand(self) -> bool:
+        # the shared state is checked once every 64 expansions
+        if self.expansions % 64 == 0 and is_clique_search_cancelled(self.root_index):
+            self.cancelled = True
+            self.exceeded = True
+        return super().expand()
+
+# state shared by the workers of find_clique_parallel, set once when each worker starts
+clique_worker_state = {}
+
+def init_clique_worker(nodes: list[tuple[int, int]], bits: list[int], clique_size: int, ranked: bool, budget: SearchBudget, stop_event: multiprocessing.Event, first_root: multiprocessing.Value) -> None:
+    clique_worker_state['bitset_connectivity_graph'] = BitsetConnectivityGraph({}, nodes, bits)
+    clique_worker_state['clique_size'] = clique_size
+    clique_worker_state['ranked'] = ranked
+    # time and expansions are counted for all the roots searched by the worker
+    clique_worker_state['budget'] = CliqueWorkerBudget(budget.time_limit, budget.max_expansions, budget.start_time)
+    clique_worker_state['stop_event'] = stop_event
+    clique_worker_state['first_root'] = first_root
+
+def is_clique_search_cancelled(root_index: int) -> bool:
+    if clique_worker_state['ranked']:
+        return clique_worker_state['first_root'].value < root_index
+    return clique_worker_state['stop_event'].is_set()
+
+def find_clique_from_roots(root_indices: range) -> tuple[int, list[tuple[int, int]], int, bool]:
+    # returns the index of the first root from which a clique has been found (and the clique), the number of expansions,
+    # and whether the time or expansions limits have been exceeded
+    bitset_connectivity_graph = clique_worker_state['bitset_connectivity_graph']
+    budget = clique_worker_state['budget']
+    previous_expansions = budget.expansions
+
+    for i in root_indices:
+        if budget.exceeded or is_clique_search_cancelled(i):
+            break
+        budget.root_index = i
+        root = bitset_connectivity_graph.nodes[i]
+        candidates = bitset_connectivity_graph.get_bits(root) >> (i + 1) << (i + 1)
+        clique = extend_clique(bitset_connectivity_graph, [root], candidates, clique_worker_state['clique_size'], clique_worker_state['ranked'], budget)
+        if clique is not None:
+            clique_worker_state['stop_event'].set()
+            with clique_worker_state['first_root'].get_lock():
+                clique_worker_state['first_root'].value = min(clique_worker_state['first_root'].value, i)
+            return i, clique, budget.expansions - previous_expansions, False
+        if budget.exceeded:
+            break
+
+    return -1, [], budget.expansions - previous_expansions, budget.exceeded and not budget.cancelled
+
+def extend_clique(bitset_connectivity_graph: BitsetConnectivityGraph, clique: list[tuple[int, int]], candidates: int, clique_size: int, ranked: bool, budget: SearchBudget = None) -> list[tuple[int, int]]:
+    # candidates is the bitset of the nodes connected to all nodes of the clique, returns None if the clique can't be completed
+    # there is no excluded set (X in Bron-Kerbosch): cliques of clique_size nodes are searched, not maximal cliques
+    if len(clique) == clique_size:
+        return clique
+    if budget is not None and not budget.expand():
+        return None
+    missing_nodes = clique_size - len(clique)
+    if candidates.bit_count() < missing_nodes:
+        return None
+
+    # a clique which doesn't contain the pivot can't contain only its neighbors, otherwise the pivot could replace one of its nodes:
+    # only the pivot and the candidates not connected to it are branched on, the pivot is the candidate with most neighbors among candidates
+    # a ranked search branches on all candidates, since skipping the neighbors of the pivot would not follow the ranking
+    if (ranked):
+        branches = candidates
+    else:
+        pivot = max(bitset_connectivity_graph.get_nodes(candidates), key=lambda node: (candidates & bitset_connectivity_graph.get_bits(node)).bit_count())
+        branches = candidates & ~bitset_connectivity_graph.get_bits(pivot)
+
+    for node in bitset_connectivity_graph.get_nodes(branches):
+        # nodes which are not connected to enough of the other candidates, to complete the clique, are skipped
+        new_candidates = candidates & bitset_connectivity_graph.get_bits(node)
+        if new_candidates.bit_count() >= missing_nodes - 1:
+            new_clique = extend_clique(bitset_connectivity_graph, clique + [node], new_candidates, clique_size, ranked, budget)
+            if new_clique is not None:
+                return new_clique
+            if budget is not None and budget.exceeded:
+                return None
+        # every clique containing the node has been searched
+        candidates ^= bitset_connectivity_graph.get_node_bit(node)
+        if candidates.bit_count() < missing_nodes:
+            break
+
+    return None
+
+def find_random_clique(bitset_connectivity_graph: BitsetConnectivityGraph, root: tuple[int, int], clique_size: int, rng: random.Random, budget: SearchBudget = None) -> list[tuple[int, int]]:
+    # returns a clique of clique_size nodes containing root, whose nodes are added in random order (with backtracking),
+    # or no nodes if there isn't any, or the search budget is exceeded
+    clique = extend_random_clique(bitset_connectivity_graph, [root], bitset_connectivity_graph.get_bits(root), clique_size, rng, budget)
+    return [] if clique is None else clique
 
-    return cliques
+def extend_random_clique(bitset_connectivity_graph: BitsetConnectivityGraph, clique: list[tuple[int, int]], candidates: int, clique_size: int, rng: random.Random, budget: SearchBudget = None) -> list[tuple[int, int]]:
+    # same as extend_clique, with the candidates branched on in random order
+    if len(clique) == clique_size:
+        return clique
+    if budget is not None and not budget.expand():
+        return None
+    missing_nodes = clique_size - len(clique)
+    if candidates.bit_count() < missing_nodes:
+        return None
+
+    branches = bitset_connectivity_graph.get_nodes(candidates)
+    rng.shuffle(branches)
+    for node in branches:
+        new_candidates = candidates & bitset_connectivity_graph.get_bits(node)
+        if new_candidates.bit_count() >= missing_nodes - 1:
+            new_clique = extend_random_clique(bitset_connectivity_graph, clique + [node], new_candidates, clique_size, rng, budget)
+            if new_clique is not None:
+                return new_clique
+            if budget is not None and budget.exceeded:
+                return None
+        # cliques with this node have all been tried
+        candidates ^= bitset_connectivity_graph.get_node_bit(node)
+        if candidates.bit_count() < missing_nodes:
+            break
+
+    return None
 
 def are_nodes_connected(map: list[list[bool]], start_x: int, start_y: int, dest_x: int, dest_y: int, args: list) -> bool:
     connected = False
@@ -60,28 +591,98 @@ def are_nodes_connected(map: list[list[bool]], start_x: int, start_y: int, dest_
     return connected
 
 def get_reduced_connectivity_graph(connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], num_of_agents: int) -> dict[tuple[int, int], list[tuple[int, int]]]:
-    reduced_connectivity_graph = connectivity_graph.copy()
+    # returns a view without the nodes which can't be part of a clique of num_of_agents nodes,
+    # which are those outside the (num_of_agents - 1)-core of the graph
+    # a lazy connectivity graph is reduced on demand, otherwise all its nodes would be computed
+    if isinstance(connectivity_graph, LazyConnectivityGraph):
+        return LazyReducedConnectivityGraph(connectivity_graph, num_of_agents)
+
+    return ReducedConnectivityGraph(connectivity_graph, get_core_numbers(connectivity_graph), num_of_agents - 1)
+
+def get_core_numbers(connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]]) -> dict[tuple[int, int], int]:
+    # the core number of a node is the largest k such that the node belongs to the k-core of the graph
+    # nodes are peeled in order of degree, using buckets (Batagelj and Zaversnik), in O(V + E)
+    # core numbers are cached on the graph, when it supports it (plain dicts don't)
+    core_numbers = getattr(connectivity_graph, 'core_numbers', None)
+    if core_numbers is None:
+        degeneracy_ordering, core_numbers = peel_connectivity_graph(connectivity_graph)
+        if hasattr(connectivity_graph, 'core_numbers'):
+            connectivity_graph.core_numbers = core_numbers
+            connectivity_graph.degeneracy_ordering = degeneracy_ordering
+
+    return core_numbers
 
-    changed = True
-    while (changed):
-        changed = False
+def get_degeneracy_ordering(connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]]) -> list[tuple[int, int]]:
+    # returns the nodes in the order they are peeled: each node has at most (degeneracy of the graph) neighbors after it
+    # the ordering needs all the nodes, so lazy graphs keep their own order
+    # the ordering of a reduced view is the one of its underlying graph, since removing nodes can't add neighbors after a node
+    # the ordering is cached on the graph, when it supports it (plain dicts don't)
+    if isinstance(connectivity_graph, (LazyConnectivityGraph, LazyReducedConnectivityGraph)):
+        return list(connectivity_graph.keys())
+    if isinstance(connectivity_graph, ReducedConnectivityGraph):
+        return [node for node in get_degeneracy_ordering(connectivity_graph.connectivity_graph) if node in connectivity_graph]
 
-        values_to_remove = []
-        for k in connectivity_graph.keys():
-            if k in reduced_connectivity_graph.keys():
-                if len(connectivity_graph[k]) + 1 < num_of_agents:
-                    reduced_connectivity_graph.pop(k)
-                    values_to_remove.append(k)
-                    changed = True
+    degeneracy_ordering = getattr(connectivity_graph, 'degeneracy_ordering', None)
+    if degeneracy_ordering is None:
+        degeneracy_ordering, core_numbers = peel_connectivity_graph(connectivity_graph)
+        if hasattr(connectivity_graph, 'degeneracy_ordering'):
+            connectivity_graph.core_numbers = core_numbers
+            connectivity_graph.degeneracy_ordering = degeneracy_ordering
 
-        for v in values_to_remove:
-            for k in reduced_connectivity_graph:
-                if v in reduced_connectivity_graph[k]: reduced_connectivity_graph[k].remove(v)
+    return degeneracy_ordering
 
-    return reduced_connectivity_graph
+def peel_connectivity_graph(connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]]) -> tuple[list[tuple[int, int]], dict[tuple[int, int], int]]:
+    # returns the order in which nodes are peeled and their core numbers
+    nodes = list(connectivity_graph.keys())
+    index = {nodes[i]: i for i in range(len(nodes))}
+    adjacency = [[index[n] for n in connectivity_graph[node]] for node in nodes]
+    degrees = [len(neighbors) for neighbors in adjacency]
+
+    # nodes sorted by degree, bin_starts[d] is the position of the first node with degree d
+    max_degree = max(degrees, default=0)
+    bin_starts = [0] * (max_degree + 1)
+    for d in degrees:
+        bin_starts[d] += 1
+    start = 0
+    for d in range(max_degree + 1):
+        start, bin_starts[d] = start + bin_starts[d], start
+    sorted_nodes = [0] * len(nodes)
+    positions = [0] * len(nodes)
+    for v in range(len(nodes)):
+        positions[v] = bin_starts[degrees[v]]
+        sorted_nodes[positions[v]] = v
+        bin_starts[degrees[v]] += 1
+    for d in range(max_degree, 0, -1):
+        bin_starts[d] = bin_starts[d - 1]
+    bin_starts[0] = 0
+
+    # when a node is peeled, its neighbors with higher degree move down one bucket
+    for i in range(len(nodes)):
+        v = sorted_nodes[i]
+        for u in adjacency[v]:
+            if degrees[u] > degrees[v]:
+                du = degrees[u]
+                pu = positions[u]
+                pw = bin_starts[du]
+                w = sorted_nodes[pw]
+                if u != w:
+                    positions[u], positions[w] = pw, pu
+                    sorted_nodes[pu], sorted_nodes[pw] = w, u
+                bin_starts[du] += 1
+                degrees[u] -= 1
+
+    degeneracy_ordering = [nodes[v] for v in sorted_nodes]
+    core_numbers = {nodes[i]: degrees[i] for i in range(len(nodes))}
+
+    return degeneracy_ordering, core_numbers
 
 def generate_connectivity_graph(map: list[list[bool]], args: list) -> dict[tuple[int, int], list[tuple[int, int]]]:
-    connectivity_graph = {}
+    if args.connection_criterion == ConnectionCriterion.PATH_LENGTH.name:
+        return generate_connectivity_graph_path_length(map, args.connection_distance)
+    if args.connection_criterion == ConnectionCriterion.DISTANCE.name:
+        return generate_connectivity_graph_distance(map, args.connection_distance)
+
+    connectivity_graph = ConnectivityGraph()
 
     for row in range(len(map)):
         for col in range(len(map[0])):
@@ -100,13 +701,264 @@ def generate_connectivity_graph(map: list[list[bool]], args: list) -> dict[tuple
 
     return connectivity_graph
 
+def get_node_neighbors(map: list[list[bool]], node: tuple[int, int], criterion: str, connection_distance: float, stencil: list[tuple[int, int]] = None) -> list[tuple[int, int]]:
+    # returns the adjacency list of a single node, in the same (row-major) order used by generate_connectivity_graph
+    x, y = node
+    rows = len(map)
+    cols = len(map[0])
+    neighbors = []
+
+    if criterion == ConnectionCriterion.NONE.name:
+        neighbors = [(col, row) for row in range(rows) for col in range(cols) if map[row][col] == False and (col, row) != node]
+
+    elif criterion == ConnectionCriterion.DISTANCE.name:
+        if stencil is None:
+            stencil = get_distance_stencil(connection_distance)
+        # the stencil is already sorted in row-major order
+        for d_row, d_col in stencil:
+            row = y + d_row
+            col = x + d_col
+            if row >= 0 and row < rows and col >= 0 and col < cols and map[row][col] == False:
+                neighbors.append((col, row))
+
+    elif criterion == ConnectionCriterion.PATH_LENGTH.name:
+        reachable_nodes = sorted(get_path_lengths_within(map, (y, x), math.floor(connection_distance)).keys())
+        neighbors = [(col, row) for row, col in reachable_nodes if (row, col) != (y, x)]
+
+    else:
+        raise RuntimeError("Unknown connection criterion: " + criterion)
+
+    return neighbors
+
+def repair_connectivity_graph(map: list[list[bool]], connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], toggled_cells: list[tuple[int, int]], args: list) -> dict[tuple[int, int], list[tuple[int, int]]]:
+    # updates a connectivity graph after some cells (x, y) of its map have been toggled (obstacle <-> free),
+    # map is the edited map; the result is the same as generate_connectivity_graph on the edited map
+    if args.connection_criterion == ConnectionCriterion.NONE.name:
+        # every node is connected to every other one, all adjacency lists change
+        return generate_connectivity_graph(map, args)
+
+    affected_nodes = get_affected_nodes(map, toggled_cells, args.connection_distance)
+    stencil = get_distance_stencil(args.connection_distance) if args.connection_criterion == ConnectionCriterion.DISTANCE.name else None
+
+    repaired_connectivity_graph = ConnectivityGraph()
+    for row in range(len(map)):
+        for col in range(len(map[0])):
+            if map[row][col] == False:
+                key = (col, row)
+                if key in affected_nodes:
+                    repaired_connectivity_graph[key] = get_node_neighbors(map, key, args.connection_criterion, args.connection_distance, stencil)
+                else:
+                    repaired_connectivity_graph[key] = list(connectivity_graph[key])
+
+    return repaired_connectivity_graph
+
+def get_affected_nodes(map: list[list[bool]], toggled_cells: list[tuple[int, int]], connection_distance: float) -> set[tuple[int, int]]:
+    # a node can gain or lose connections only if a toggled cell is within connection_distance from it:
+    # both a path of length <= floor(connection_distance) and a rounded Euclidean distance <= connection_distance
+    # are contained in a square of side 2 * floor(connection_distance) + 1 centered in the node
+    affected_nodes = set()
+    radius = max(0, math.floor(connection_distance))
+
+    for x, y in toggled_cells:
+        for row in range(max(0, y - radius), min(len(map), y + radius + 1)):
+            for col in range(max(0, x - radius), min(len(map[0]), x + radius + 1)):
+                if map[row][col] == False:
+                    affected_nodes.add((col, row))
+
+    return affected_nodes
+
+def get_toggled_cells(map: list[list[bool]], connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]]) -> list[tuple[int, int]]:
+    # returns the cells (x, y) whose state differs between the map and the one the connectivity graph was built on
+    toggled_cells = []
+
+    for row in range(len(map)):
+        for col in range(len(map[0])):
+            if (map[row][col] == False) != ((col, row) in connectivity_graph):
+                toggled_cells.append((col, row))
+
+    return toggled_cells
+
+def generate_connectivity_graph_parallel(map: list[list[bool]], args: list, workers: int) -> tuple[dict[tuple[int, int], list[tuple[int, int]]], list[tuple[int, int, int, float]]]:
+    # the source nodes are split in bands of rows, one shard for each worker; the map is shared read-only by the workers
+    # shards are merged in order, so the result is the same as generate_connectivity_graph
+    # also returns the timing of each shard: (first row, last row, number of nodes, time)
+    rows = len(map)
+    if args.connection_criterion != ConnectionCriterion.PATH_LENGTH.name:
+        # the DISTANCE graph is built by a few array operations on the whole map, and the NONE graph has no per-node search:
+        # moving the adjacency lists between processes would cost more than building them, so a single shard is used
+        start_time = time.time()
+        connectivity_graph = generate_connectivity_graph(map, args)
+        return connectivity_graph, [(0, rows - 1, len(connectivity_graph), time.time() - start_time)]
+
+    connectivity_graph = ConnectivityGraph()
+    shard_timings = []
+
+    num_of_shards = max(1, min(workers, rows))
+    bands = []
+    for i in range(num_of_shards):
+        bands.append((i * rows // num_of_shards, (i + 1) * rows // num_of_shards))
+
+    with multiprocessing.Pool(num_of_shards, initializer=init_shard_worker, initargs=(map, args.connection_distance)) as pool:
+        shards = pool.map(generate_connectivity_graph_shard, bands)
+
+    # each shard only holds the connections to the following nodes, which are added to both adjacency lists,
+    # in the same order as generate_connectivity_graph_path_length
+    for row in range(rows):
+        for col in range(len(map[0])):
+            if map[row][col] == False:
+                connectivity_graph[(col, row)] = []
+    for i in range(len(bands)):
+        following_nodes_lists, shard_time = shards[i]
+        for key, following_nodes in following_nodes_lists:
+            connectivity_graph[key].extend(following_nodes)
+            for node in following_nodes:
+                connectivity_graph[node].append(key)
+        shard_timings.append((bands[i][0], bands[i][1] - 1, len(following_nodes_lists), shard_time))
+
+    return connectivity_graph, shard_timings
+
+# state shared by the workers of generate_connectivity_graph_parallel, set once when each worker starts
+shard_worker_state = {}
+
+def init_shard_worker(map: list[list[bool]], connection_distance: float) -> None:
+    shard_worker_state['map'] = map
+    shard_worker_state['max_path_length'] = math.floor(connection_distance)
+
+def generate_connectivity_graph_shard(band: tuple[int, int]) -> tuple[list[tuple[tuple[int, int], list[tuple[int, int]]]], float]:
+    # one BFS from each node of the band, as in generate_connectivity_graph_path_length:
+    # only the nodes following the source node (in row-major order) are kept
+    start_time = time.time()
+    map = shard_worker_state['map']
+
+    following_nodes_lists = []
+    for row in range(band[0], band[1]):
+        for col in range(len(map[0])):
+            if map[row][col] == False:
+                start = (row, col)
+                following_nodes = [loc for loc in get_path_lengths_within(map, start, shard_worker_state['max_path_length']).keys() if loc > start]
+                following_nodes.sort()
+                following_nodes_lists.append(((col, row), [(next_col, next_row) for next_row, next_col in following_nodes]))
+
+    return following_nodes_lists, time.time() - start_time
+
+def generate_connectivity_graph_path_length(map: list[list[bool]], connection_distance: float) -> dict[tuple[int, int], list[tuple[int, int]]]:
+    # one BFS, cut off at the connection distance, is run from each node
+    # path length on the grid is symmetric, so each connection found is added to both adjacency lists
+    connectivity_graph = ConnectivityGraph()
+    max_path_length = math.floor(connection_distance)
+
+    for row in range(len(map)):
+        for col in range(len(map[0])):
+            if map[row][col] == False:
+                key = (col, row)
+                connectivity_graph[key] = []
+
+    for key in connectivity_graph.keys():
+        start = (key[1], key[0])
+        # only nodes following the current one (in row-major order) are considered,
+        # the preceding ones have already added the current node to their adjacency lists and viceversa
+        following_nodes = [loc for loc in get_path_lengths_within(map, start, max_path_length).keys() if loc > start]
+        following_nodes.sort()
+        for row, col in following_nodes:
+            connectivity_graph[key].append((col, row))
+            connectivity_graph[(col, row)].append(key)
+
+    return connectivity_graph
+
+def get_path_lengths_within(map: list[list[bool]], start: tuple[int, int], max_path_length: int) -> dict[tuple[int, int], int]:
+    # returns the path length from start to every node which can be reached within max_path_length moves, start included
+    # nodes are in (row, col) format
+    path_lengths = {start: 0}
+    if max_path_length <= 0:
+        return path_lengths
+
+    rows = len(map)
+    cols = len(map[0])
+    queue = deque([start])
+    while queue:
+        row, col = queue.popleft()
+        length = path_lengths[(row, col)] + 1
+        for next_row, next_col in ((row, col - 1), (row + 1, col), (row, col + 1), (row - 1, col)):
+            if next_row < 0 or next_row >= rows or next_col < 0 or next_col >= cols:
+                continue
+            if map[next_row][next_col] or (next_row, next_col) in path_lengths:
+                continue
+            path_lengths[(next_row, next_col)] = length
+            if length < max_path_length:
+                queue.append((next_row, next_col))
+
+    return path_lengths
+
+def generate_connectivity_graph_distance(map: list[list[bool]], connection_distance: float) -> dict[tuple[int, int], list[tuple[int, int]]]:
+    connectivity_graph = ConnectivityGraph()
+    cols = len(map[0])
+    offsets, neighbors = get_distance_adjacency(map, connection_distance)
+    offsets = offsets.tolist()
+    neighbors = neighbors.tolist()
+
+    # node tuples are created once and shared by all the adjacency lists
+    nodes = [(cell % cols, cell // cols) for cell in range(len(offsets) - 1)]
+    for row in range(len(map)):
+        for col in range(cols):
+            if map[row][col] == False:
+                cell = row * cols + col
+                connectivity_graph[nodes[cell]] = [nodes[n] for n in neighbors[offsets[cell]:offsets[cell + 1]]]
+
+    return connectivity_graph
+
+def get_distance_adjacency(map: list[list[bool]], connection_distance: float) -> tuple[np.ndarray, np.ndarray]:
+    # returns the DISTANCE criterion adjacency in CSR form, cells are identified by their index (row * cols + col):
+    # the neighbors of cell c are neighbors[offsets[c]:offsets[c + 1]], sorted in row-major order
+    free = np.logical_not(np.array(map, dtype=bool))
+    rows, cols = free.shape
+    cells = np.arange(rows * cols, dtype=np.int64).reshape(rows, cols)
+
+    # the stencil is applied to the whole map at once, one offset at a time
+    sources = [np.empty(0, dtype=np.int64)]
+    targets = [np.empty(0, dtype=np.int64)]
+    for d_row, d_col in get_distance_stencil(connection_distance):
+        # offsets as large as the map connect no cell
+        if abs(d_row) >= rows or abs(d_col) >= cols:
+            continue
+        source_rows = slice(max(0, -d_row), rows - max(0, d_row))
+        source_cols = slice(max(0, -d_col), cols - max(0, d_col))
+        target_rows = slice(max(0, d_row), rows - max(0, -d_row))
+        target_cols = slice(max(0, d_col), cols - max(0, -d_col))
+        connected = free[source_rows, source_cols] & free[target_rows, target_cols]
+        sources.append(cells[source_rows, source_cols][connected])
+        targets.append(cells[target_rows, target_cols][connected])
+
+    sources = np.concatenate(sources)
+    targets = np.concatenate(targets)
+    order = np.lexsort((targets, sources))
+    neighbors = targets[order]
+    offsets = np.zeros(rows * cols + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=rows * cols), out=offsets[1:])
+
+    return offsets, neighbors
+
+def get_distance_stencil(connection_distance: float) -> list[tuple[int, int]]:
+    # returns the (row, col) offsets of all nodes within connection_distance from a node,
+    # distances are rounded exactly as get_euclidean_distance does
+    stencil = []
+    if connection_distance < 0:
+        return stencil
+
+    radius = math.floor(connection_distance)
+    for d_row in range(-radius, radius + 1):
+        for d_col in range(-radius, radius + 1):
+            if (d_row, d_col) != (0, 0) and get_euclidean_distance(0, 0, d_col, d_row) <= connection_distance:
+                stencil.append((d_row, d_col))
+
+    return stencil
+
 def import_connectivity_graph(filename: str) -> dict[tuple[int, int], list[tuple[int, int]]]:
     file = Path(filename)
     if not file.is_file():
         raise BaseException(filename + " does not exist.")
     file = open(filename, 'r')
 
-    connectivity_graph = {}
+    connectivity_graph = ConnectivityGraph()
 
     while True:
         line = file.readline()
@@ -118,7 +970,8 @@ def import_connectivity_graph(filename: str) -> dict[tuple[int, int], list[tuple
         key = (int(key_coords[0]), int(key_coords[1]))
 
         values = []
-        raw_nodes = line_elements[1].strip().split(",")
+        # isolated nodes have no neighbors listed
+        raw_nodes = line_elements[1].strip().split(",") if line_elements[1].strip() != "" else []
         for i in range(len(raw_nodes)):
             node_coords = re.sub("[()]", "", raw_nodes[i]).split(" ")
             v = (int(node_coords[0]), int(node_coords[1]))
@@ -146,6 +999,70 @@ def save_connectivity_graph(connectivity_graph: dict[tuple[int, int], list[tuple
     sys.stdout = sys.__stdout__
     sys.stderr = sys.__stderr__
 
+def is_binary_connectivity_graph_current(bin_path: str, txt_path: str) -> bool:
+    # a binary file converted from a text one is stale if the text one has been regenerated or patched since then
+    bin_file = Path(bin_path)
+    txt_file = Path(txt_path)
+    if not bin_file.is_file():
+        return False
+    return not txt_file.is_file() or bin_file.stat().st_mtime >= txt_file.stat().st_mtime
+
+def import_connectivity_graph_binary(filename: str) -> CSRConnectivityGraph:
+    # the arrays are memory-mapped, nothing is parsed
+    file = Path(filename)
+    if not file.is_file():
+        raise BaseException(filename + " does not exist.")
+
+    header = np.fromfile(filename, dtype=BINARY_HEADER, count=1)
+    if len(header) == 0 or header['magic'][0] != BINARY_MAGIC:
+        raise BaseException(filename + " is not a binary connectivity graph.")
+    header = header[0]
+    if header['version'] != BINARY_VERSION:
+        raise BaseException(filename + " has unsupported version " + str(header['version']) + ".")
+
+    num_of_nodes = int(header['num_of_nodes'])
+    num_of_edges = int(header['num_of_edges'])
+    offset = BINARY_HEADER.itemsize
+    nodes = np.memmap(filename, dtype='<u4', mode='r', offset=offset, shape=(num_of_nodes,))
+    offset += nodes.nbytes
+    offsets = np.memmap(filename, dtype='<u8', mode='r', offset=offset, shape=(num_of_nodes + 1,))
+    offset += offsets.nbytes
+    # np.memmap refuses empty arrays
+    if num_of_edges > 0:
+        neighbors = np.memmap(filename, dtype='<u4', mode='r', offset=offset, shape=(num_of_edges,))
+    else:
+        neighbors = np.empty(0, dtype='<u4')
+
+    return CSRConnectivityGraph(int(header['rows']), int(header['cols']), nodes, offsets, neighbors,
+                                ConnectionCriterion(int(header['criterion'])).name, float(header['connection_distance']))
+
+def save_connectivity_graph_binary(connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], rows: int, cols: int, criterion: str, connection_distance: float, path: str) -> None:
+    keys = sorted(connectivity_graph.keys(), key=lambda node: (node[1], node[0]))
+
+    nodes = np.array([y * cols + x for x, y in keys], dtype='<u4')
+    offsets = np.zeros(len(keys) + 1, dtype='<u8')
+    neighbors = []
+    for i in range(len(keys)):
+        neighbors.extend([y * cols + x for x, y in connectivity_graph[keys[i]]])
+        offsets[i + 1] = len(neighbors)
+    neighbors = np.array(neighbors, dtype='<u4')
+
+    header = np.zeros(1, dtype=BINARY_HEADER)
+    header['magic'] = BINARY_MAGIC
+    header['version'] = BINARY_VERSION
+    header['rows'] = rows
+    header['cols'] = cols
+    header['criterion'] = ConnectionCriterion[criterion].value
+    header['connection_distance'] = connection_distance
+    header['num_of_nodes'] = len(nodes)
+    header['num_of_edges'] = len(neighbors)
+
+    with open(path, 'wb') as f:
+        header.tofile(f)
+        nodes.tofile(f)
+        offsets.tofile(f)
+        neighbors.tofile(f)
+
 def print_connectivity_graph(connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]]) -> None: 
     for key in connectivity_graph:
         print(str(key) + " is connected to: " + str(connectivity_graph[key]))
\ No newline at end of file
@@ -0,0 +1,96 @@
+from .connectivity_graphs import get_path_lengths_within
+from collections import OrderedDict
+import numpy as np
+
+'''
+    a distance field holds the length of the shortest path from a source node to every cell of the map (np.inf if it can't be reached),
+    fields use (row, col) coordinates, like the map
+    the fields of the last map used are cached, so that goals choice, goals assignment and CBS compute each of them once:
+    the cache is bounded in memory, and the least recently used fields are dropped when it is full
+'''
+
+DEFAULT_DISTANCE_FIELDS_CACHE_SIZE = 64
+
+distance_fields_cache = {'map': None, 'fields': OrderedDict(), 'size': 0, 'max_size': DEFAULT_DISTANCE_FIELDS_CACHE_SIZE * 1024 * 1024, 'hits': 0, 'misses': 0}
+
+def get_distance_fields(map: list[list[bool]], sources: list[tuple[int, int]]) -> np.ndarray:
+    # returns a (number of sources x rows x cols) array, fields[i] is the distance field of the i-th source
+    fields = get_cached_distance_fields(map)
+
+    source_fields = []
+    for source in sources:
+        field = fields.get(source)
+        if field is not None:
+            fields.move_to_end(source)
+            distance_fields_cache['hits'] += 1
+        else:
+            field = compute_distance_field(map, source)
+            distance_fields_cache['misses'] += 1
+            fields[source] = field
+            distance_fields_cache['size'] += field.nbytes
+            evict_distance_fields()
+        source_fields.append(field)
+
+    return np.stack(source_fields) if sources else np.empty((0, len(map), len(map[0])))
+
+def get_cached_distance_fields(map: list[list[bool]]) -> OrderedDict[tuple[int, int], np.ndarray]:
+    # fields computed for another map are dropped, and hits and misses are counted again from 0
+    map_key = tuple(tuple(row) for row in map)
+    if distance_fields_cache['map'] != map_key:
+        distance_fields_cache['map'] = map_key
+        distance_fields_cache['fields'] = OrderedDict()
+        distance_fields_cache['size'] = 0
+        distance_fields_cache['hits'] = 0
+        distance_fields_cache['misses'] = 0
+    return distance_fields_cache['fields']
+
+def evict_distance_fields() -> None:
+    # the least recently used fields are dropped until the cache fits its maximum size
+    fields = distance_fields_cache['fields']
+    while distance_fields_cache['size'] > distance_fields_cache['max_size'] and len(fields) > 0:
+        _, field = fields.popitem(last=False)
+        distance_fields_cache['size'] -= field.nbytes
+
+def set_distance_fields_cache_size(max_size: int) -> None:
+    # maximum size in MB, 0 keeps no field from one request to the next
+    distance_fields_cache['max_size'] = max_size * 1024 * 1024
+    evict_distance_fields()
+
+def get_distance_fields_cache_stats() -> dict[str, int]:
+    return {'hits': distance_fields_cache['hits'], 'misses': distance_fields_cache['misses'],
+            'fields': len(distance_fields_cache['fields']), 'size': distance_fields_cache['size']}
+
+def get_goal_heuristics(map: list[list[bool]], goals: list[tuple[int, int]]) -> list[dict[tuple[int, int], int]]:
+    # heuristics tables for CBS (the same compute_heuristics returns, with the reachable cells only), read from the distance fields of the goals
+    heuristics = []
+    for field in get_distance_fields(map, goals):
+        rows, cols = np.nonzero(np.isfinite(field))
+        heuristics.append(dict(zip(zip(rows.tolist(), cols.tolist()), field[rows, cols].astype(int).tolist())))
+    return heuristics
+
+def compute_distance_field(map: list[list[bool]], source: tuple[int, int]) -> np.ndarray:
+    # breadth-first search from source over the whole map: moves have unit cost, so lengths are the same as compute_heuristics ones
+    field = np.full((len(map), len(map[0])), np.inf)
+    path_lengths = get_path_lengths_within(map, source, len(map) * len(map[0]))
+    cells = np.array(list(path_lengths.keys()), dtype=np.int64).reshape(-1, 2)
+    field[cells[:, 0], cells[:, 1]] = list(path_lengths.values())
+    return field
+
+def get_path_distance_matrix(map: list[list[bool]], starts: list[tuple[int, int]], nodes: list[tuple[int, int]]) -> np.ndarray:
+    # matrix[i][k] is the length of the shortest path between the i-th start (row, col) and the k-th node (x, y)
+    node_cells = np.array(nodes, dtype=np.int64).reshape(-1, 2)
+    return get_distance_fields(map, starts)[:, node_cells[:, 1], node_cells[:, 0]]
+
+def get_start_goal_path_lengths(map: list[list[bool]], starts: list[tuple[int, int]], goals: list[tuple[int, int]]) -> np.ndarray:
+    # matrix[i][j] is the length of the shortest path between the i-th start and the j-th goal, both (row, col)
+    # moves are reversible, so the matrix can be read from the distance fields of either side:
+    # the side with fewer fields left to compute is used (the starts ones, on ties, since goals choice may have computed them)
+    fields = get_cached_distance_fields(map)
+    missing_starts = len(set(starts).difference(fields))
+    missing_goals = len(set(goals).difference(fields))
+
+    if missing_goals < missing_starts:
+        start_cells = np.array(starts, dtype=np.int64).reshape(-1, 2)
+        return get_distance_fields(map, goals)[:, start_cells[:, 0], start_cells[:, 1]].T
+    goal_cells = np.array(goals, dtype=np.int64).reshape(-1, 2)
+    return get_distance_fields(map, starts)[:, goal_cells[:, 0], goal_cells[:, 1]]
@@ -3,11 +3,29 @@ from enum import Enum
 class GoalsChoice(Enum):
     UNINFORMED_GENERATION = 1
     INFORMED_GENERATION = 2
+    OPTIMAL_GENERATION = 3
+    PATH_INFORMED_GENERATION = 4
+    INDEXED_GENERATION = 5
+
+class GoalsChoiceStatus(Enum):
+    OPTIMAL = 1
+    FOUND = 2
+    INFEASIBLE = 3
+    NOT_PROVEN = 4
+
+class CliqueCost(Enum):
+    MAX = 1
+    SUM = 2
 
 class GoalsAssignment(Enum):
     HUNGARIAN = 1
     LOCAL_SEARCH = 2
     RANDOM = 3
+    CONFLICT_AWARE = 4
+
+class AssignmentBackend(Enum):
+    JONKER_VOLGENANT = 1
+    MUNKRES = 2
 
 class ConnectionCriterion(Enum):
     NONE = 1
@@ -1,100 +1,192 @@
-from .single_agent_planner import compute_heuristics
-from .utils import get_shortest_path_length
-from random import shuffle, seed
-import munkres
+from .assignment_solvers import solve_assignment, solve_assignments
+from .cbs import detect_collisions
+from .distance_fields import get_distance_fields, get_goal_heuristics, get_start_goal_path_lengths
+from .enums import AssignmentBackend
+from .single_agent_planner import a_star
+from collections import deque
+from random import Random, randrange, shuffle, seed
+import multiprocessing
+import numpy as np
 
 LOCAL_SEARCH_TRAJECTORIES = 5
+LOCAL_SEARCH_TABU_SIZE = 16
+LOCAL_SEARCH_MAX_STALL = 50
+CONFLICT_AWARE_MAX_ASSIGNMENTS = 32
 
-def search_goals_assignment_hungarian(map: list[list[bool]], starts: list[tuple[int, int]], goal_positions: list[tuple[int, int]]) -> list[tuple[int, int]]:
-    # the Hungarian algorithm is used to return an optimal agent-goal assignment
-    # cost for each couple (agent start, goal) is calculated with A*
+def search_goals_assignment_hungarian(map: list[list[bool]], starts: list[tuple[int, int]], goal_positions: list[tuple[int, int]], backend: str = AssignmentBackend.JONKER_VOLGENANT.name) -> list[tuple[int, int]]:
+    # the Hungarian algorithm (or the Jonker-Volgenant one, which solves the same problem faster) is used to return an optimal agent-goal assignment
+    # cost for each couple (agent start, goal) is the length of the shortest path between them
     new_goals = []
     cost = 0
 
     path_length_matrix = get_path_length_matrix(map, starts, goal_positions)
 
-    m = munkres.Munkres()
-    indexes = m.compute(path_length_matrix)
-    for row, col in indexes:
+    assignment = solve_assignment(path_length_matrix, backend)
+    for row, col in enumerate(assignment):
         cost += path_length_matrix[row][col]
         new_goals.append(goal_positions[col])
 
     return new_goals, cost
 
-def search_goals_assignment_local_search(map: list[list[bool]], starts: list[tuple[int, int]], goal_positions: list[tuple[int, int]]) -> list[tuple[int, int]]:
-    # returns an assignment found with a local search, not garanteed to be optimal
-    seed()
+def search_goals_assignments_hungarian(map: list[list[bool]], starts: list[tuple[int, int]], goal_positions_list: list[list[tuple[int, int]]], backend: str = AssignmentBackend.JONKER_VOLGENANT.name) -> list[tuple[list[tuple[int, int]], int]]:
+    # same as search_goals_assignment_hungarian, for many sets of goal positions at once (e.g. one per candidate clique)
+    # the path length matrices are read together from the distance fields of the starts, and solved in a single batch
+    if len(goal_positions_list) == 0:
+        return []
+    goal_cells = np.array(goal_positions_list, dtype=np.int64).reshape(len(goal_positions_list), -1, 2)
+    path_length_matrices = get_distance_fields(map, starts)[:, goal_cells[:, :, 0], goal_cells[:, :, 1]].transpose(1, 0, 2)
+    if not np.isfinite(path_length_matrices).all():
+        raise RuntimeError("Some goals can't be reached by some agents!")
+
+    assignments = solve_assignments(path_length_matrices, backend)
+    costs = np.take_along_axis(path_length_matrices, assignments[:, :, None], axis=2).sum(axis=(1, 2)).astype(int).tolist()
+    return [([goal_positions[col] for col in assignment], cost) for goal_positions, assignment, cost in zip(goal_positions_list, assignments.tolist(), costs)]
+
+def search_goals_assignment_conflict_aware(map: list[list[bool]], starts: list[tuple[int, int]], goal_positions: list[tuple[int, int]], backend: str = AssignmentBackend.JONKER_VOLGENANT.name) -> list[tuple[int, int]]:
+    # returns an optimal agent-goal assignment, like search_goals_assignment_hungarian, chosen among the optimal ones (up to CONFLICT_AWARE_MAX_ASSIGNMENTS)
+    # as the one whose agents' shortest paths, planned independently, have the fewest collisions:
+    # these are the paths (and collisions) of the root node of CBS, fewer collisions usually mean fewer nodes for CBS to expand
     new_goals = []
 
     path_length_matrix = get_path_length_matrix(map, starts, goal_positions)
-    
-    # local search begins from a random assignments, then works to improve it
-    initial_assignments_container = []
-    for _ in range(LOCAL_SEARCH_TRAJECTORIES):
-        initial_assignment = []
-        for i in range(len(goal_positions)):
-            initial_assignment.append(i)
-        shuffle(initial_assignment)
-        initial_assignments_container.append(initial_assignment)
-
-    costs = []
-    explored_assignments_container = []
-    for i in range(LOCAL_SEARCH_TRAJECTORIES):
-        costs.append(get_assignment_cost_astar(path_length_matrix, initial_assignments_container[i])) 
-        explored_assignments_container.append({})
-        explored_assignments_container[i][tuple(initial_assignments_container[i])] = costs[i]
-
-    chosen_assignments = []
-    for i in range(LOCAL_SEARCH_TRAJECTORIES):
-        chosen_assignments.append(initial_assignments_container[i])
-
-    candidate_assignments_container = []
-    for i in range(LOCAL_SEARCH_TRAJECTORIES):
-        candidate_assignments_container.append([initial_assignments_container[0]])
+    assignments = get_optimal_assignments(np.array(path_length_matrix, dtype=np.float64).reshape(len(starts), len(goal_positions)), CONFLICT_AWARE_MAX_ASSIGNMENTS, backend)
+
+    # a path only depends on its agent and goal, paths are shared by the assignments
+    heuristics = get_goal_heuristics(map, goal_positions)
+    paths = {}
+    chosen_assignment = assignments[0]
+    chosen_collisions = None
+    for assignment in assignments:
+        assignment_paths = []
+        for agent, goal in enumerate(assignment):
+            if (agent, goal) not in paths:
+                paths[(agent, goal)] = a_star(map, starts[agent], goal_positions[goal], heuristics[goal], agent, [])
+            assignment_paths.append(paths[(agent, goal)])
+        collisions = len(detect_collisions(assignment_paths))
+        if chosen_collisions is None or collisions < chosen_collisions:
+            chosen_assignment = assignment
+            chosen_collisions = collisions
+            if collisions == 0:
+                break
+
+    cost = 0
+    for agent, goal in enumerate(chosen_assignment):
+        cost += path_length_matrix[agent][goal]
+        new_goals.append(goal_positions[goal])
 
+    return new_goals, cost
+
+def get_optimal_assignments(cost_matrix: np.ndarray, max_assignments: int, backend: str = AssignmentBackend.JONKER_VOLGENANT.name) -> list[list[int]]:
+    # returns up to max_assignments distinct assignments with the minimum total cost, the one found by the assignment solver first
+    # Murty's partitioning: the assignments which differ from a known one are split in disjoint subproblems,
+    # the i-th keeps the first i rows of the known assignment, and forbids its column for row i
+    # only subproblems whose best assignment is still optimal are partitioned further (ties are enumerated, not the k-best)
+    # forbidden and fixed couples get a cost higher than any assignment, the subproblems of a partition are solved in a single batch
+    n = len(cost_matrix)
+    forbidden_cost = cost_matrix.sum() + 1
+    first_assignment = solve_assignment(cost_matrix.tolist(), backend)
+    optimal_cost = cost_matrix[np.arange(n), first_assignment].sum()
+
+    assignments = [first_assignment]
+    # each subproblem is a cost matrix, with the assignment to partition
+    open_subproblems = deque([(cost_matrix, first_assignment)])
+    while open_subproblems and len(assignments) < max_assignments:
+        subproblem_matrix, assignment = open_subproblems.popleft()
+        # the last subproblem would keep all the rows but one, which has no other column left: it is left out
+        subproblem_matrices = np.repeat(subproblem_matrix[None, :, :], n - 1, axis=0)
+        for i in range(n - 1):
+            for row in range(i):
+                # row keeps its column: the other columns are forbidden for it, and the column for the other rows
+                col = assignment[row]
+                fixed_cost = subproblem_matrices[i, row, col]
+                subproblem_matrices[i, row, :] = forbidden_cost
+                subproblem_matrices[i, :, col] = forbidden_cost
+                subproblem_matrices[i, row, col] = fixed_cost
+            subproblem_matrices[i, i, assignment[i]] = forbidden_cost
+
+        for subproblem_matrix, subproblem_assignment in zip(subproblem_matrices, solve_assignments(subproblem_matrices, backend).tolist()):
+            if subproblem_matrix[np.arange(n), subproblem_assignment].sum() == optimal_cost:
+                assignments.append(subproblem_assignment)
+                open_subproblems.append((subproblem_matrix, subproblem_assignment))
+                if len(assignments) >= max_assignments:
+                    break
+
+    return assignments
+
+def search_goals_assignment_local_search(map: list[list[bool]], starts: list[tuple[int, int]], goal_positions: list[tuple[int, int]], trajectories: int = LOCAL_SEARCH_TRAJECTORIES, workers: int = 1) -> list[tuple[int, int]]:
+    # returns an assignment found with a local search, not garanteed to be optimal
     # multiple "trajectories" are considered:
     # the local search starts from different random assignments, then the best outcome is chosen
-    for traj in range(LOCAL_SEARCH_TRAJECTORIES):
-
-        while (len(candidate_assignments_container[traj]) >= 1):
-            assignment = candidate_assignments_container[traj].pop()
-
-            go_on = True
-            while(go_on):
-                go_on = False
-                # the algorithm improves the assignment by switching indexes and checking if the cost has been reduced
-                for i in range(len(assignment)):
-                    for j in range(i + 1, len(assignment)):
-                        new_assignment = swap_assigment_indexes(assignment.copy(), i, j)
-                        if tuple(new_assignment) in explored_assignments_container[traj]:
-                            continue
-                        new_cost = get_assignment_cost_astar(path_length_matrix, new_assignment)
-                        explored_assignments_container[traj][tuple(new_assignment)] = new_cost
-                        if new_cost == costs[traj]:
-                            candidate_assignments_container[traj].append(new_assignment)
-                        elif new_cost < costs[traj]:
-                            candidate_assignments_container[traj] = [new_assignment]
-                            chosen_assignments[traj] = new_assignment
-                            costs[traj] = new_cost
-                            go_on = True
-                            break
-                    else:
-                        continue
-                    break 
-
-    final_assignment = chosen_assignments[0]
-    final_cost = costs[0]
-
-    for i in range(LOCAL_SEARCH_TRAJECTORIES):
-        if costs[i] < final_cost:
-            final_cost = costs[i]
-            final_assignment = chosen_assignments[i]
+    # with more than one worker, trajectories are run in parallel
+    seed()
+    new_goals = []
+
+    path_length_matrix = np.array(get_path_length_matrix(map, starts, goal_positions), dtype=np.int64).reshape(len(starts), len(goal_positions))
+    trajectory_seeds = [randrange(2**32) for _ in range(trajectories)]
+
+    if workers > 1 and trajectories > 1:
+        with multiprocessing.Pool(min(workers, trajectories)) as pool:
+            outcomes = pool.starmap(search_local_search_trajectory, [(path_length_matrix, trajectory_seed) for trajectory_seed in trajectory_seeds])
+    else:
+        outcomes = [search_local_search_trajectory(path_length_matrix, trajectory_seed) for trajectory_seed in trajectory_seeds]
+
+    final_assignment, final_cost = min(outcomes, key=lambda outcome: outcome[1])
 
     for i in final_assignment:
         new_goals.append(goal_positions[i])
 
     return new_goals, final_cost
 
+def search_local_search_trajectory(path_length_matrix: np.ndarray, trajectory_seed: int) -> tuple[list[int], int]:
+    # tabu search over the 2-opt neighborhood (the assignments obtained swapping the goals of two agents), from a random assignment:
+    # at each step the best swap is applied, even if it doesn't reduce the cost, unless it has been applied recently (it is in the tabu list),
+    # which prevents going back and forth, if it doesn't lead to the best assignment found so far
+    # the search stops after LOCAL_SEARCH_MAX_STALL steps without improvement
+    rng = Random(trajectory_seed)
+    n = len(path_length_matrix)
+    assignment = list(range(n))
+    rng.shuffle(assignment)
+    assignment = np.array(assignment, dtype=np.int64)
+    cost = int(path_length_matrix[np.arange(n), assignment].sum())
+    if n < 2:
+        return assignment.tolist(), cost
+
+    best_assignment = assignment.copy()
+    best_cost = cost
+    rows, cols = np.triu_indices(n, 1)
+    # with 2 agents there is a single swap, which still needs a tabu list of size 1
+    tabu_list = deque(maxlen=max(1, min(LOCAL_SEARCH_TABU_SIZE, len(rows) - 1)))
+    tabu = np.zeros(len(rows), dtype=bool)
+
+    stall = 0
+    while stall < LOCAL_SEARCH_MAX_STALL:
+        # the cost change of swapping the goals of agents i and j only depends on 4 entries of the matrix:
+        # costs[i][j] is the cost of agent i going to the goal of agent j
+        costs = path_length_matrix[:, assignment]
+        current_costs = costs.diagonal()
+        deltas = costs[rows, cols] + costs[cols, rows] - current_costs[rows] - current_costs[cols]
+        allowed = ~tabu | (cost + deltas < best_cost)
+        if not allowed.any():
+            break
+        k = np.where(allowed, deltas, np.iinfo(np.int64).max).argmin()
+
+        i, j = rows[k], cols[k]
+        assignment[i], assignment[j] = assignment[j], assignment[i]
+        cost += int(deltas[k])
+        if len(tabu_list) == tabu_list.maxlen:
+            tabu[tabu_list[0]] = False
+        tabu_list.append(k)
+        tabu[k] = True
+
+        if cost < best_cost:
+            best_assignment = assignment.copy()
+            best_cost = cost
+            stall = 0
+        else:
+            stall += 1
+
+    return best_assignment.tolist(), best_cost
+
 def get_random_goal_assignment(map: list[list[bool]], starts: list[tuple[int, int]], goal_positions: list[tuple[int, int]]) -> list[tuple[int, int]]:
     # returns a randomly generated agent-goal assignment
     seed()
@@ -113,16 +205,12 @@ def get_random_goal_assignment(map: list[list[bool]], starts: list[tuple[int, in
     return new_goals, cost
 
 def get_path_length_matrix(map: list[list[bool]], starts: list[tuple[int, int]], goal_positions: list[tuple[int, int]]) -> list[list[int]]:
-    path_length_matrix = []
-    for _ in range(len(starts)):
-        path_length_matrix.append([])
-    
-    for g in range(len(goal_positions)):
-        heuristics = compute_heuristics(map, goal_positions[g])
-        for s in range(len(starts)):
-            path_length_matrix[s].append(get_shortest_path_length(map, starts[s], goal_positions[g], heuristics))
- 
-    return path_length_matrix
+    # all assignment strategies share the same matrix, built with one breadth-first search per start (or per goal)
+    path_length_matrix = get_start_goal_path_lengths(map, starts, goal_positions)
+    if not np.isfinite(path_length_matrix).all():
+        raise RuntimeError("Some goals can't be reached by some agents!")
+
+    return path_length_matrix.astype(int).tolist()
 
 def get_assignment_cost_astar(path_length_matrix: list[list[int]], assignment: list[int]) -> int:
     total = 0
@@ -134,12 +222,6 @@ def get_assignment_cost_astar(path_length_matrix: list[list[int]], assignment: l
 
     return total
 
-def swap_assigment_indexes(assignment: list[int], index1: int, index2: int) -> None:
-    temp = assignment[index1]
-    assignment[index1] = assignment[index2]
-    assignment[index2] = temp
-    return assignment
-
 def print_goals_assignment(goals: list[tuple[int, int]]) -> None:
     for i in range(len(goals)):
         print("agent " + str(i) + " goes to: " + str(goals[i][1]) + ", " + str(goals[i][0]))
\ No newline at end of file
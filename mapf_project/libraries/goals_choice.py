@@ -1,99 +1,290 @@
-from .utils import get_euclidean_distance
-from .connectivity_graphs import get_reduced_connectivity_graph
+from .enums import CliqueCost, GoalsChoiceStatus
+from .distance_fields import get_path_distance_matrix
+from .connectivity_graphs import BitsetConnectivityGraph, SearchBudget, WindowedConnectivityGraph, find_clique, find_clique_parallel, find_random_clique, get_degeneracy_ordering, get_reduced_connectivity_graph
+import heapq
+import math
+import numpy as np
+import random
+import statistics
 
-def generate_goal_positions(starts: list[tuple[int, int]], connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], informed: bool) -> list[tuple[int, int]]:
+SAMPLE_STRATA = 4
+SAMPLE_ATTEMPTS = 10
+SAMPLE_MAX_EXPANSIONS = 100
+
+def generate_goal_positions(starts: list[tuple[int, int]], connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], informed: bool, map: list[list[bool]] = None, budget: SearchBudget = None, workers: int = 1) -> list[tuple[int, int]]:
     # returns a set of nodes which are strongly connected in the connectivity graph (a clique)
+    # if the map is given, informed search uses path lengths instead of Euclidean distances
+    # if the search budget is exceeded before a clique is found, no nodes are returned
+    # with more than one worker, the search is split among processes
     goal_positions = []
 
     connectivity_graph = get_reduced_connectivity_graph(connectivity_graph, len(starts))
 
-    keys = list(connectivity_graph.keys())
     # if doing an informed search:
     # Euclidean distance is calculated for each (agent start position, connectivity graph node) couple
     # these values are used as an heuristic to determine a potential goal clique mean distance to all agents starting locations
+    # nodes are ranked by this heuristic, and the clique search tries the best ranked nodes first
+    # otherwise, nodes are searched in degeneracy order, which keeps the candidate sets small
     if (informed):
-        distance_matrix = get_distance_matrix(starts, keys)
-
-        keys_with_cost = {}
-        for k in range(len(keys)):
-            distance_to_all_starting_locations = 0
-            for s in range(len(starts)):
-                distance_to_all_starting_locations += distance_matrix[s][k]
-            keys_with_cost[keys[k]] = distance_to_all_starting_locations
-
-        keys = sorted(keys, key=lambda node: keys_with_cost[node])
-
-    chosen_clique = []
-    clique_lists = []
-    for _ in range(len(starts)):
-        clique_lists.append([])
-    for k in keys:
-        clique_lists[0].append([k])
-
-    # k levels of search are needed, with k = number of agents (searched clique dimension)
-    level = 0
-    while clique_lists[-1] == []:
-        if level < 0:
+        keys, _ = get_nodes_ranking(starts, list(connectivity_graph.keys()), map)
+    else:
+        keys = get_degeneracy_ordering(connectivity_graph)
+
+    # k nodes are needed, with k = number of agents (searched clique dimension)
+    bitset_connectivity_graph = BitsetConnectivityGraph(connectivity_graph, keys)
+    chosen_clique = find_clique_parallel(bitset_connectivity_graph, len(starts), informed, workers, budget)
+
+    for node in chosen_clique:
+        goal_positions.append((node[1], node[0]))
+
+    return goal_positions
+
+def generate_goal_positions_windowed(starts: list[tuple[int, int]], connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], informed: bool, window_size: int, map: list[list[bool]] = None, budget: SearchBudget = None, workers: int = 1) -> tuple[list[tuple[int, int]], list[int]]:
+    # same as generate_goal_positions, but the search is restricted to a square window (of window_size cells per side)
+    # centered on the agents starting locations, whose size is doubled until a clique is found inside it
+    # the last window holds all the nodes, so no clique is missed
+    # returns the goal positions and the sizes of the windows tried
+    window_sizes = []
+    goal_positions = []
+    if len(starts) == 0:
+        return goal_positions, window_sizes
+
+    # starts are (row, col), nodes are (x, y)
+    center = (sum(start[1] for start in starts) / len(starts), sum(start[0] for start in starts) / len(starts))
+    max_half_size = max((max(abs(node[0] - center[0]), abs(node[1] - center[1])) for node in connectivity_graph.keys()), default=0)
+
+    window_size = max(window_size, 1)
+    while True:
+        window_sizes.append(window_size)
+        windowed_connectivity_graph = WindowedConnectivityGraph(connectivity_graph, center, window_size / 2)
+        if len(windowed_connectivity_graph) >= len(starts):
+            goal_positions = generate_goal_positions(starts, windowed_connectivity_graph, informed, map, budget, workers)
+        if goal_positions != [] or window_size / 2 >= max_half_size or (budget is not None and budget.exceeded):
+            return goal_positions, window_sizes
+        window_size *= 2
+
+def search_goal_positions_branch_and_bound(starts: list[tuple[int, int]], connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], clique_cost: str, budget: SearchBudget = None) -> tuple[list[tuple[int, int]], int]:
+    # returns the clique with the lowest cost, and the number of partial cliques explored to find it and prove it is the best one
+    # if the search budget is exceeded, the best clique found so far is returned
+    # the cost of a node is its distance to all agents starting locations (as in informed generation),
+    # the cost of a clique is the max or the sum of the costs of its nodes
+    goal_positions = []
+
+    connectivity_graph = get_reduced_connectivity_graph(connectivity_graph, len(starts))
+    keys, costs = get_nodes_ranking(starts, list(connectivity_graph.keys()))
+    bitset_connectivity_graph = BitsetConnectivityGraph(connectivity_graph, keys)
+
+    # the clique found by informed generation is the first incumbent
+    chosen_clique = find_clique(bitset_connectivity_graph, len(starts), ranked=True, budget=budget)
+    if chosen_clique == []:
+        return goal_positions, 0
+    chosen_clique_cost = get_cliques_costs(np.array([[bitset_connectivity_graph.index[node] for node in chosen_clique]]), costs, clique_cost)[0]
+    costs = costs.tolist()
+
+    # partial cliques are explored best-first, ordered by a lower bound on the cost of any clique which completes them
+    # nodes are added in cost order, so the missing nodes can only be taken among the candidates which come after the last one:
+    # the bound takes the cheapest of them, ignoring whether they are connected with each other
+    all_nodes = (1 << len(keys)) - 1
+    open_list = [(get_cost_lower_bound(0, all_nodes, len(starts), costs, clique_cost), 0, [], 0, all_nodes)]
+    counter = 1
+    nodes_explored = 0
+    while open_list:
+        lower_bound, _, clique, cost, candidates = heapq.heappop(open_list)
+        # no partial clique left can be completed with a lower cost than the incumbent: it is the best clique
+        if lower_bound >= chosen_clique_cost:
             break
-        if clique_lists[level] == []:
-            level -= 1
-            continue
-        
-        # a clique is popped from current search level list
-        current_clique = clique_lists[level][0]
-        clique_lists[level].remove(current_clique)
-
-        # gets all nodes which are connected to all nodes already part of the clique
-        intersection = connectivity_graph[current_clique[0]].copy()
-        for i in range(1, len(current_clique)):
-            intersection = list(set(intersection) & set(connectivity_graph[current_clique[i]]))
-
-        # for each of the nodes found:
-        # if node is not already in the clique, a new clique with it added in it is created
-        # all new cliques are appended in the search list of current level + 1
-        nodes_to_add = intersection.copy()
-        new_cliques_added = 0
-        for node in nodes_to_add:
-            if node not in current_clique:
-                new_clique = current_clique.copy()
-                new_clique.append(node)
-                clique_lists[level+1].append(new_clique)
-                new_cliques_added += 1
-        if new_cliques_added == 0:
-            continue
-        else:
-            level += 1
-            if (informed):
-                # if doing an informed search: each time new cliques are generated, they are sorted using the heuristic (mean distance to all agents starting locations)
-                clique_lists[level] = sorted(clique_lists[level], key=lambda clique: get_max_cost(clique, keys_with_cost))
-
-    # if a clique of k nodes has been generated, the algorithm halts and it is returned
-    if len(clique_lists[-1]) > 0:
-        chosen_clique = clique_lists[-1][0]
-
-    if chosen_clique != []:
-        for node in chosen_clique:
-            goal_positions.append((node[1], node[0]))
+        if budget is not None and not budget.expand():
+            break
+        nodes_explored += 1
+
+        missing_nodes = len(starts) - len(clique)
+        for node in bitset_connectivity_graph.get_nodes(candidates):
+            candidates ^= bitset_connectivity_graph.get_node_bit(node)
+            node_cost = costs[bitset_connectivity_graph.index[node]]
+            # all the missing nodes cost at least as much as this one: if it already makes the clique worse than the incumbent,
+            # the nodes which come after it do the same
+            if clique_cost == CliqueCost.MAX.name:
+                node_lower_bound = max(cost, node_cost)
+            else:
+                node_lower_bound = cost + missing_nodes * node_cost
+            if node_lower_bound >= chosen_clique_cost:
+                break
+
+            new_clique = clique + [node]
+            new_cost = max(cost, node_cost) if clique_cost == CliqueCost.MAX.name else cost + node_cost
+            if missing_nodes == 1:
+                if new_cost < chosen_clique_cost:
+                    chosen_clique = new_clique
+                    chosen_clique_cost = new_cost
+                continue
+
+            new_candidates = candidates & bitset_connectivity_graph.get_bits(node)
+            if new_candidates.bit_count() < missing_nodes - 1:
+                continue
+            new_lower_bound = get_cost_lower_bound(new_cost, new_candidates, missing_nodes - 1, costs, clique_cost)
+            if new_lower_bound < chosen_clique_cost:
+                heapq.heappush(open_list, (new_lower_bound, counter, new_clique, new_cost, new_candidates))
+                counter += 1
+
+    for node in chosen_clique:
+        goal_positions.append((node[1], node[0]))
+
+    return goal_positions, nodes_explored
+
+def search_goal_positions_clique_index(starts: list[tuple[int, int]], clique_index: dict[str, np.ndarray], clique_cost: str, map: list[list[bool]] = None) -> list[tuple[int, int]]:
+    # returns the best clique of the index: the best clique of k nodes inside a maximal clique is made of its k cheapest nodes
+    # cliques are looked up by a lower bound on the cost of their nodes, given by the distances between the starts and their bounding box
+    # (then by the distance between their centroid and the starts centroid), and re-ranked by their actual cost:
+    # the lookup stops when no clique left can beat the best one found
+    # if the map is given, node costs are path lengths instead of Euclidean distances (the bound still holds)
+    # an index without the maximal cliques smaller than min_clique_size may miss some of the cliques of k nodes
+    goal_positions = []
+    k = len(starts)
+    if int(clique_index['min_clique_size']) > k:
+        raise RuntimeError("The clique index only holds maximal cliques of at least " + str(int(clique_index['min_clique_size'])) + " nodes, it must be built with a minimum clique size of at most " + str(k) + " to be searched for " + str(k) + " agents")
+
+    offsets = clique_index['offsets']
+    sizes = np.diff(offsets)
+    cliques = np.nonzero(sizes >= k)[0]
+    if k == 0 or len(cliques) == 0:
+        return goal_positions
+
+    # costs of all the nodes of the index
+    cols = int(clique_index['cols'])
+    cells = np.unique(clique_index['nodes'])
+    nodes = [(cell % cols, cell // cols) for cell in cells.tolist()]
+    if map is None:
+        cells_costs = get_distance_matrix(starts, nodes).sum(axis=0)
+    else:
+        cells_costs = get_path_distance_matrix(map, starts, nodes).sum(axis=0)
+
+    # distance from each start to each bounding box, rounded down as get_euclidean_distance could round the distance to a node
+    start_cells = np.array(starts, dtype=np.float64).reshape(-1, 2)
+    bounding_boxes = clique_index['bounding_boxes'][cliques]
+    d_x = np.maximum(np.maximum(bounding_boxes[:, 0] - start_cells[:, 1, None], start_cells[:, 1, None] - bounding_boxes[:, 2]), 0)
+    d_y = np.maximum(np.maximum(bounding_boxes[:, 1] - start_cells[:, 0, None], start_cells[:, 0, None] - bounding_boxes[:, 3]), 0)
+    nodes_lower_bounds = np.maximum(np.sqrt(d_x**2 + d_y**2) - 0.01, 0).sum(axis=0)
+    lower_bounds = nodes_lower_bounds if clique_cost == CliqueCost.MAX.name else k * nodes_lower_bounds
+
+    starts_centroid = start_cells[:, ::-1].mean(axis=0)
+    centroid_distances = np.linalg.norm(clique_index['centroids'][cliques] - starts_centroid, axis=1)
+    lookup_order = np.lexsort((centroid_distances, lower_bounds))
+
+    chosen_cells = None
+    chosen_cost = np.inf
+    for i in lookup_order:
+        if lower_bounds[i] >= chosen_cost:
+            break
+        clique = cliques[i]
+        clique_cells = clique_index['nodes'][offsets[clique]:offsets[clique + 1]]
+        clique_costs = cells_costs[np.searchsorted(cells, clique_cells)]
+        cheapest = np.argsort(clique_costs, kind='stable')[:k]
+        cost = get_cliques_costs(cheapest[None, :], clique_costs, clique_cost)[0]
+        if cost < chosen_cost:
+            chosen_cells = clique_cells[cheapest]
+            chosen_cost = cost
+
+    if chosen_cells is not None:
+        for cell in chosen_cells.tolist():
+            goal_positions.append((cell // cols, cell % cols))
 
     return goal_positions
 
-def get_max_cost(clique, keys_costs):
-    max = 0
-    for node in clique:
-        if keys_costs[node] > max:
-            max = keys_costs[node]
-    return max
+def sample_cliques(starts: list[tuple[int, int]], connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], sample_size: int, rng: random.Random) -> list[list[tuple[int, int]]]:
+    # returns up to sample_size distinct random cliques of len(starts) nodes, as sorted lists of (x, y) nodes, without enumerating all cliques
+    # the sample is stratified by cost: nodes are ranked as in informed generation and split in SAMPLE_STRATA strata of equal size,
+    # and each stratum provides the root of the same share of the sampled cliques, so that cheap and expensive cliques are both represented
+    # each clique is searched with a small expansions limit, and at most SAMPLE_ATTEMPTS searches per sampled clique are tried
+    cliques = []
+    connectivity_graph = get_reduced_connectivity_graph(connectivity_graph, len(starts))
+    keys, _ = get_nodes_ranking(starts, list(connectivity_graph.keys()))
+    if len(starts) == 0 or len(keys) < len(starts):
+        return cliques
+    bitset_connectivity_graph = BitsetConnectivityGraph(connectivity_graph, keys)
+    strata = [stratum for stratum in np.array_split(np.arange(len(keys)), SAMPLE_STRATA) if len(stratum) > 0]
+
+    sampled = set()
+    for attempt in range(sample_size * SAMPLE_ATTEMPTS):
+        if len(cliques) >= sample_size:
+            break
+        root = keys[rng.choice(strata[attempt % len(strata)].tolist())]
+        clique = find_random_clique(bitset_connectivity_graph, root, len(starts), rng, SearchBudget(max_expansions=SAMPLE_MAX_EXPANSIONS * len(starts)))
+        if clique != [] and tuple(sorted(clique)) not in sampled:
+            sampled.add(tuple(sorted(clique)))
+            cliques.append(sorted(clique))
+
+    return cliques
+
+def get_optimality_factor(cost: float, costs: list[float]) -> float:
+    # 1 for the best of the evaluated cliques, 0 for the worst
+    best_cost = min(costs)
+    worst_cost = max(costs)
+    if worst_cost - best_cost == 0:
+        return 1.0
+    return 1 - ((cost - best_cost) / (worst_cost - best_cost))
+
+def get_cheaper_cliques_share_confidence_interval(cost: float, sampled_costs: list[float], confidence: float = 0.95) -> tuple[float, float]:
+    # confidence interval (Wilson score) of the share of all cliques which are cheaper than a clique with the given cost,
+    # estimated from the share of the sampled cliques which are cheaper: unlike the range of the sampled costs,
+    # it accounts for the cliques not sampled, so a clique cheaper than all the sampled ones still gets a share above 0,
+    # which shrinks as the sample grows (the sampled cliques are treated as a uniform sample of all cliques)
+    n = len(sampled_costs)
+    if n == 0:
+        return 0.0, 1.0
+    share = sum(1 for sampled_cost in sampled_costs if sampled_cost < cost) / n
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    center = (share + z**2 / (2 * n)) / (1 + z**2 / n)
+    half_width = z * math.sqrt(share * (1 - share) / n + z**2 / (4 * n**2)) / (1 + z**2 / n)
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+def get_goal_positions_status(goal_positions: list[tuple[int, int]], budget: SearchBudget, optimal: bool) -> str:
+    # a search which has not exceeded its budget has either found a clique (the best one, if the search is optimal) or proven there isn't any
+    if goal_positions != []:
+        return GoalsChoiceStatus.OPTIMAL.name if optimal and not budget.exceeded else GoalsChoiceStatus.FOUND.name
+    return GoalsChoiceStatus.NOT_PROVEN.name if budget.exceeded else GoalsChoiceStatus.INFEASIBLE.name
+
+def get_cost_lower_bound(cost: float, candidates: int, missing_nodes: int, costs: list[float], clique_cost: str) -> float:
+    # lower bound on the cost of a clique with the given partial cost, completed with missing_nodes of the candidates
+    # candidates bits follow the costs order, so the cheapest candidates are the lowest bits
+    for _ in range(missing_nodes):
+        lowest_bit = candidates & -candidates
+        node_cost = costs[lowest_bit.bit_length() - 1]
+        cost = max(cost, node_cost) if clique_cost == CliqueCost.MAX.name else cost + node_cost
+        candidates ^= lowest_bit
+    return cost
+
+def get_cliques_costs(cliques: np.ndarray, costs: np.ndarray, clique_cost: str) -> np.ndarray:
+    # cliques is a (number of cliques x clique size) matrix of node indices, costs are the costs of the nodes
+    # returns the max or the sum of the costs of the nodes of each clique
+    if clique_cost == CliqueCost.MAX.name:
+        return costs[cliques].max(axis=1)
+    elif clique_cost == CliqueCost.SUM.name:
+        return costs[cliques].sum(axis=1)
+    else:
+        raise RuntimeError("Unknown clique cost: " + clique_cost)
 
-def get_distance_matrix(starts: list[tuple[int, int]], nodes: list[tuple[int, int]]) -> list[list[int]]:
-    matrix = []
-    for _ in range(len(starts)):
-        matrix.append([])
+def get_nodes_ranking(starts: list[tuple[int, int]], nodes: list[tuple[int, int]], map: list[list[bool]] = None) -> tuple[list[tuple[int, int]], np.ndarray]:
+    # the cost of a node is the sum of its Euclidean distances to all agents starting locations,
+    # or the sum of its path lengths from all agents starting locations if the map is given
+    # returns the nodes sorted by cost (ties keep the given order) and their costs, nodes which some agent can't reach are left out
+    if map is None:
+        costs = get_distance_matrix(starts, nodes).sum(axis=0)
+    else:
+        costs = get_path_distance_matrix(map, starts, nodes).sum(axis=0)
+    ranking = np.argsort(costs, kind='stable')
+    ranking = ranking[np.isfinite(costs[ranking])]
+    return [nodes[i] for i in ranking], costs[ranking]
 
-    for i in range(len(matrix)):
-        for node in nodes:
-            matrix[i].append(get_euclidean_distance(starts[i][0], starts[i][1], node[1], node[0]))
+def get_distance_matrix(starts: list[tuple[int, int]], nodes: list[tuple[int, int]]) -> np.ndarray:
+    # matrix[i][k] is the distance between the i-th start (row, col) and the k-th node (x, y), computed for all couples at once
+    start_cells = np.array(starts, dtype=np.int64).reshape(-1, 2)
+    node_cells = np.array(nodes, dtype=np.int64).reshape(-1, 2)
+    squared_distances = (node_cells[:, 1] - start_cells[:, 0, None])**2 + (node_cells[:, 0] - start_cells[:, 1, None])**2
 
-    return matrix
+    # the distinct squared distances are few: each is rounded exactly as get_euclidean_distance does
+    values, inverse = np.unique(squared_distances, return_inverse=True)
+    distances = np.array([round(math.sqrt(value), 2) for value in values.tolist()], dtype=np.float64)
+    return distances[inverse].reshape(squared_distances.shape)
 
 def print_goal_positions(goal_positions: list[tuple[int, int]]) -> None:
     for goal in goal_positions:
@@ -3,11 +3,16 @@ from .single_agent_planner import a_star, get_sum_of_cost
 from .cbs import CBSSolver
 from typing import Optional
 from pathlib import Path
+import os
 import sys
 
 def get_euclidean_distance(x1: int, y1: int, x2: int, y2: int) -> float:
     return round((math.sqrt((x2 - x1)**2 + (y2 - y1)**2)), 2)
 
+def get_instance_id(filename: str) -> str:
+    # name of the instance file without directories and extension, for both '/' and '\\' separators
+    return os.path.splitext(os.path.basename(filename.replace("\\", "/")))[0]
+
 def get_shortest_path_length(map: list[list[bool]], start_node: tuple[int, int], goal_node: tuple[int, int], heuristics: dict) -> int:
     path = a_star(map, start_node, goal_node, heuristics, 0, [])
     return len(path) - 1
@@ -35,9 +40,9 @@ def print_locations(my_map, locations):
         to_print += '\n'
     print(to_print)
 
-def get_cbs_cost(map: list[list[bool]], starts: list[tuple[int, int]], goals: list[tuple[int, int]], shared_var):
+def get_cbs_cost(map: list[list[bool]], starts: list[tuple[int, int]], goals: list[tuple[int, int]], shared_var, heuristics: Optional[list[dict]] = None):
     sys.stdout = None
-    cbs = CBSSolver(map, starts, goals)
+    cbs = CBSSolver(map, starts, goals, heuristics)
     paths = cbs.find_solution(False)
     cost = get_sum_of_cost(paths, goals, starts)
     sys.stdout = sys.__stdout__
@@ -1,15 +1,21 @@
 import argparse
 import glob
+import itertools
 import multiprocessing
+import random
 import time
 import sys
 import os
+from collections.abc import Iterator
 from libraries.cbs import CBSSolver
-from libraries.connectivity_graphs import generate_connectivity_graph, import_connectivity_graph, print_connectivity_graph, find_all_cliques
-from libraries.enums import ConnectionCriterion, GoalsChoice, GoalsAssignment
-from libraries.goals_choice import print_goal_positions, generate_goal_positions
-from libraries.goals_assignment import print_goals_assignment, search_goals_assignment_local_search, search_goals_assignment_hungarian, get_random_goal_assignment
-from libraries.utils import print_mapf_instance, import_mapf_instance, get_cbs_cost
+from libraries.connectivity_graph_cache import DEFAULT_CACHE_SIZE, cache_connectivity_graph, get_cached_connectivity_graph
+from libraries.connectivity_graphs import LazyConnectivityGraph, generate_connectivity_graph, import_connectivity_graph, import_connectivity_graph_binary, is_binary_connectivity_graph_current, print_connectivity_graph, count_cliques, generate_cliques, SearchBudget
+from libraries.enums import AssignmentBackend, CliqueCost, ConnectionCriterion, GoalsChoice, GoalsChoiceStatus, GoalsAssignment
+from libraries.goals_choice import print_goal_positions, generate_goal_positions, generate_goal_positions_windowed, get_goal_positions_status, search_goal_positions_branch_and_bound, search_goal_positions_clique_index, sample_cliques, get_optimality_factor, get_cheaper_cliques_share_confidence_interval
+from libraries.clique_index import get_clique_index_path, import_clique_index
+from libraries.goals_assignment import LOCAL_SEARCH_TRAJECTORIES, print_goals_assignment, search_goals_assignment_local_search, search_goals_assignment_hungarian, search_goals_assignments_hungarian, search_goals_assignment_conflict_aware, get_random_goal_assignment
+from libraries.distance_fields import DEFAULT_DISTANCE_FIELDS_CACHE_SIZE, get_distance_fields_cache_stats, get_goal_heuristics, set_distance_fields_cache_size
+from libraries.utils import print_mapf_instance, import_mapf_instance, get_cbs_cost, get_instance_id
 from libraries.visualize import Enhanced_Animation
 
 '''
@@ -19,20 +25,43 @@ from libraries.visualize import Enhanced_Animation
 '''
 
 TIMEOUT = 60
+ASSIGNMENT_BATCH_SIZE = 256
 
-def get_goal_positions(map: list[list[bool]], starts: list[tuple[int, int]], connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], args: list) -> list[tuple[int, int]]:
+def get_goal_positions(map: list[list[bool]], starts: list[tuple[int, int]], connectivity_graph: dict[tuple[int, int], list[tuple[int, int]]], args: list, file_id: str) -> list[tuple[int, int]]:
     goal_positions = []
 
-    # a clique of nodes is generated using the requested algorithm
+    # a clique of nodes is generated using the requested algorithm, within the time and expansions limits (if any)
+    budget = SearchBudget(args.time_limit, args.max_expansions)
+    optimal = False
     start_time = time.time()
-    if args.goals_choice == GoalsChoice.UNINFORMED_GENERATION.name:
-        goal_positions = generate_goal_positions(starts, connectivity_graph, informed=False)
-    elif args.goals_choice == GoalsChoice.INFORMED_GENERATION.name:
-        goal_positions = generate_goal_positions(starts, connectivity_graph, informed=True)
+    if args.goals_choice in [GoalsChoice.UNINFORMED_GENERATION.name, GoalsChoice.INFORMED_GENERATION.name, GoalsChoice.PATH_INFORMED_GENERATION.name]:
+        informed = args.goals_choice != GoalsChoice.UNINFORMED_GENERATION.name
+        path_map = map if args.goals_choice == GoalsChoice.PATH_INFORMED_GENERATION.name else None
+        if args.window_size > 0:
+            # the search starts from the nodes near the agents, and only widens if no clique is found there
+            goal_positions, window_sizes = generate_goal_positions_windowed(starts, connectivity_graph, informed, args.window_size, path_map, budget, args.workers)
+            print("Window sizes tried: " + ", ".join(str(window_size) for window_size in window_sizes) + "\n")
+        else:
+            goal_positions = generate_goal_positions(starts, connectivity_graph, informed, path_map, budget, args.workers)
+    elif args.goals_choice == GoalsChoice.INDEXED_GENERATION.name:
+        clique_index = import_clique_index(get_clique_index_path(map, file_id, args))
+        goal_positions = search_goal_positions_clique_index(starts, clique_index, args.clique_cost)
+        # a complete index holds every clique (the lookup refuses indexes without the smaller maximal cliques), so the clique found is the best one
+        optimal = bool(clique_index['complete'])
+    elif args.goals_choice == GoalsChoice.OPTIMAL_GENERATION.name:
+        goal_positions, nodes_explored = search_goal_positions_branch_and_bound(starts, connectivity_graph, args.clique_cost, budget)
+        print("Partial cliques explored (branch and bound): " + str(nodes_explored) + "\n")
+        optimal = True
     else:
         raise(RuntimeError("Unknown goals choice algorithm."))
     search_time = time.time() - start_time
 
+    status = get_goal_positions_status(goal_positions, budget, optimal)
+    print("Goals choice status: " + status + " (" + str(budget.expansions) + " expansions)\n")
+    if status == GoalsChoiceStatus.NOT_PROVEN.name:
+        # the instance is skipped, so that batch runs go on
+        print("Goals generation time (s):    {:.2f}\n".format(search_time))
+        return goal_positions
     if len(goal_positions) < len(starts):
         raise(RuntimeError("This map doesn't have enough connected nodes for all its agents!"))
     
@@ -42,50 +71,6 @@ def get_goal_positions(map: list[list[bool]], starts: list[tuple[int, int]], con
     
     # if verbose mode is on, additional info will be produced:
 
-    # total number of cliques of length k present in the problem instance, with k = number of agents
-    cliques = find_all_cliques(connectivity_graph, len(starts))
-    print("Cliques found: " + str(len(cliques)) + "\n")
-
-    # cost of each possible solution, characterized by one clique and the best agent-goal assignment for that clique
-    # the cost is found resolving each solution of the instance with CBS
-    cliques_cbs_costs = []
-    real_cost = multiprocessing.Value('i', 0)
-    i = 0
-    print("clique : lower bound (A*), real cost (CBS)")
-    for clique in cliques:
-        i += 1
-        goal_positions_temp = []
-        for n in clique:
-            goal_positions_temp.append((n[1], n[0]))
-        goal_assignment_temp, clique_heuristic_cost = search_goals_assignment_hungarian(map, starts, goal_positions_temp)
-        
-        p = multiprocessing.Process(target=get_cbs_cost, name="Get CBS cost", args=(map, starts, goal_assignment_temp, real_cost))
-        p.start()
-        counter = 0
-        while (counter < TIMEOUT):
-            time.sleep(1)
-            counter += 1
-            if (not p.is_alive()):
-                break
-        if (p.is_alive()):
-            # if CBS fails to found paths within the time limit, a lower bound is considered
-            # (sum of costs of single-agent plans found with A*, without considering conflicts, using optimal assignment found with Hungarian algorithm) 
-            print("clique " + str(i) + "/" + str(len(cliques)) + " -> " + str(clique) + ": " + str(clique_heuristic_cost))
-            cliques_cbs_costs.append((clique, clique_heuristic_cost))
-            p.terminate()
-        else:
-            print("clique " + str(i) + "/" + str(len(cliques)) + " -> " + str(clique) + ": " + str(clique_heuristic_cost) + ", " + str(real_cost.value))
-            cliques_cbs_costs.append((clique, real_cost.value))
-        p.join()
-        real_cost.value = 0
-    print()
-
-    cliques_cbs_costs.sort(key=lambda el: el[1])
-
-    # the best and worst (in terms of cost) cliques are found
-    best_clique = cliques_cbs_costs[0]
-    worst_clique = cliques_cbs_costs[-1]
-
     # time needed to generate the goals clique with uninformed generation
     start_time = time.time()
     goal_positions_uninformed = generate_goal_positions(starts, connectivity_graph, informed=False)
@@ -98,62 +83,139 @@ def get_goal_positions(map: list[list[bool]], starts: list[tuple[int, int]], con
     search_time = time.time() - start_time
     print("Goals positions (informed clique generation) search time (s):    {:.2f}\n".format(search_time))
 
-    # the cliques just found are in the (row, col) format, they must be converted to (x, y) format to be compared to those found earlier
+    # the cliques just found are in the (row, col) format, they must be converted to (x, y) format to be compared to those found later
     goal_positions_uninformed_clique = []
     for n in goal_positions_uninformed:
         goal_positions_uninformed_clique.append((n[1], n[0]))
     goal_positions_uninformed_clique.sort()
     print("Uninformed generation clique: " + str(goal_positions_uninformed_clique))
-    goal_positions_uninformed_cost = 0
 
     goal_positions_informed_clique = []
     for n in goal_positions_informed:
         goal_positions_informed_clique.append((n[1], n[0]))
     goal_positions_informed_clique.sort()
     print("Informed generation clique: " + str(goal_positions_informed_clique))
-    goal_positions_informed_cost = 0
     print()
 
+    # the cliques evaluated are all the cliques of length k present in the problem instance, with k = number of agents,
+    # or a stratified random sample of them, if a sample size is given (they are not even counted, which can take longer than sampling)
+    # the cliques found with uninformed and informed generation are always evaluated, and they are evaluated first
+    generated_cliques = [goal_positions_uninformed_clique]
+    if goal_positions_informed_clique != goal_positions_uninformed_clique:
+        generated_cliques.append(goal_positions_informed_clique)
+    if args.sample_size > 0:
+        sampled_cliques = [clique for clique in sample_cliques(starts, connectivity_graph, args.sample_size, random.Random()) if clique not in generated_cliques]
+        num_of_cliques = len(generated_cliques) + len(sampled_cliques)
+        print("Cliques sampled: " + str(num_of_cliques) + "\n")
+        cliques = itertools.chain(generated_cliques, sampled_cliques)
+    else:
+        # cliques are counted without being generated, then they are generated one at a time
+        num_of_cliques = count_cliques(connectivity_graph, len(starts))
+        print("Cliques found: " + str(num_of_cliques) + "\n")
+        cliques = itertools.chain(generated_cliques, (clique for clique in generate_cliques(connectivity_graph, len(starts)) if clique not in generated_cliques))
+
+    # cost of each possible solution, characterized by one clique and the best agent-goal assignment for that clique
+    # the cost is found resolving each solution of the instance with CBS
+    # once the time budget (if any) is spent, no more cliques are evaluated, and CBS runs are cut short so that it is not exceeded
+    cliques_cbs_costs = []
+    real_cost = multiprocessing.Value('i', 0)
+    i = 0
+    print("clique : lower bound (A*), real cost (CBS)")
+    for clique, goal_assignment_temp, clique_heuristic_cost in generate_cliques_assignments(map, starts, cliques, args.assignment_backend):
+        timeout = TIMEOUT
+        if i == len(generated_cliques):
+            evaluation_start_time = time.time()
+        if args.time_budget > 0 and i >= len(generated_cliques):
+            remaining_time = args.time_budget - (time.time() - evaluation_start_time)
+            if remaining_time <= 0:
+                break
+            timeout = min(TIMEOUT, remaining_time)
+        i += 1
+        p = multiprocessing.Process(target=get_cbs_cost, name="Get CBS cost", args=(map, starts, goal_assignment_temp, real_cost, get_goal_heuristics(map, goal_assignment_temp)))
+        p.start()
+        # the process is waited for until it ends, or the time limit expires
+        p.join(timeout)
+        if (p.is_alive()):
+            # if CBS fails to found paths within the time limit, a lower bound is considered
+            # (sum of costs of single-agent plans found with A*, without considering conflicts, using optimal assignment found with Hungarian algorithm) 
+            print("clique " + str(i) + "/" + str(num_of_cliques) + " -> " + str(clique) + ": " + str(clique_heuristic_cost))
+            cliques_cbs_costs.append((clique, clique_heuristic_cost))
+            p.terminate()
+        else:
+            print("clique " + str(i) + "/" + str(num_of_cliques) + " -> " + str(clique) + ": " + str(clique_heuristic_cost) + ", " + str(real_cost.value))
+            cliques_cbs_costs.append((clique, real_cost.value))
+        p.join()
+        real_cost.value = 0
+    print()
+    print("Cliques evaluated: " + str(len(cliques_cbs_costs)) + "/" + str(num_of_cliques) + "\n")
+
+    goal_positions_uninformed_cost = cliques_cbs_costs[0][1]
+    goal_positions_informed_cost = cliques_cbs_costs[generated_cliques.index(goal_positions_informed_clique)][1]
+    sampled_costs = [el[1] for el in cliques_cbs_costs[len(generated_cliques):]]
+    cliques_cbs_costs.sort(key=lambda el: el[1])
+
+    # the best (in terms of cost) clique is found
+    best_clique = cliques_cbs_costs[0]
+
     # all cliques are ranked by cost, highlighting the best one and those found with informed and uninformed generation
     for el in cliques_cbs_costs:
         label = ""
         if el == best_clique: label = " BEST"
         if el[0] == goal_positions_uninformed_clique:
             label += " uninformed gen clique"
-            goal_positions_uninformed_cost = el[1]
         if el[0] == goal_positions_informed_clique:
             label += " informed gen clique"
-            goal_positions_informed_cost = el[1]
         print(str(el) + label)
     print()
 
-    # optimality of the clique found with uninformed generation
-    if worst_clique[1] - best_clique[1] == 0:
-        uninformed_opt_factor = 1.0
-    else:
-        uninformed_opt_factor = round(1 - ((goal_positions_uninformed_cost - best_clique[1]) / (worst_clique[1] - best_clique[1])), 2)
-    print("Uninformed clique generation optimality: " + str(uninformed_opt_factor) + "\n")
-
-    # optimality of the clique found with informed generation
-    if worst_clique[1] - best_clique[1] == 0:
-        informed_opt_factor = 1.0
-    else:
-        informed_opt_factor = round(1 - ((goal_positions_informed_cost - best_clique[1]) / (worst_clique[1] - best_clique[1])), 2)
-    print("Informed clique generation optimality: " + str(informed_opt_factor) + "\n")
+    # optimality of the cliques found with uninformed and informed generation: 1 for the best clique, 0 for the worst one
+    # if not all cliques have been evaluated, the factors only compare the evaluated cliques, so they are labeled as estimates,
+    # and they come with a confidence interval of the share of all cliques cheaper than the generated ones,
+    # estimated from the cliques evaluated besides the generated ones
+    costs = [el[1] for el in cliques_cbs_costs]
+    sampled = args.sample_size > 0 or len(cliques_cbs_costs) < num_of_cliques
+    optimality_label = "estimated optimality" if sampled else "optimality"
+    uninformed_opt_factor = round(get_optimality_factor(goal_positions_uninformed_cost, costs), 2)
+    print("Uninformed clique generation " + optimality_label + ": " + str(uninformed_opt_factor) + "\n")
+    if sampled:
+        low, high = get_cheaper_cliques_share_confidence_interval(goal_positions_uninformed_cost, sampled_costs)
+        print("Uninformed clique generation cheaper cliques share, 95% confidence interval: [{:.2f}, {:.2f}]\n".format(low, high))
+
+    informed_opt_factor = round(get_optimality_factor(goal_positions_informed_cost, costs), 2)
+    print("Informed clique generation " + optimality_label + ": " + str(informed_opt_factor) + "\n")
+    if sampled:
+        low, high = get_cheaper_cliques_share_confidence_interval(goal_positions_informed_cost, sampled_costs)
+        print("Informed clique generation cheaper cliques share, 95% confidence interval: [{:.2f}, {:.2f}]\n".format(low, high))
 
     return goal_positions
 
+def generate_cliques_assignments(map: list[list[bool]], starts: list[tuple[int, int]], cliques: Iterator[list[tuple[int, int]]], backend: str) -> Iterator[tuple[list[tuple[int, int]], list[tuple[int, int]], int]]:
+    # yields each clique with its optimal agent-goal assignment and the assignment cost,
+    # the assignments of ASSIGNMENT_BATCH_SIZE cliques at a time are solved together
+    cliques = iter(cliques)
+    while True:
+        batch = list(itertools.islice(cliques, ASSIGNMENT_BATCH_SIZE))
+        if batch == []:
+            return
+        # cliques are in the (x, y) format, goals in the (row, col) one
+        goal_positions_list = [[(n[1], n[0]) for n in clique] for clique in batch]
+        for clique, (goals, cost) in zip(batch, search_goals_assignments_hungarian(map, starts, goal_positions_list, backend)):
+            yield clique, goals, cost
+
 def get_goals_assignment(map: list[list[bool]], starts: list[tuple[int, int]], goal_positions: list[tuple[int, int]], args: list) -> list[tuple[int, int]]:
     goals = []
 
     # an agent-goal assignment is generated using the requested algorithm
     start_time = time.time()
     if args.goals_assignment == GoalsAssignment.HUNGARIAN.name:
-        goals, cost = search_goals_assignment_hungarian(map, starts, goal_positions)
+        goals, cost = search_goals_assignment_hungarian(map, starts, goal_positions, args.assignment_backend)
         algorithm_label = "Hungarian algorithm"
     elif args.goals_assignment == GoalsAssignment.LOCAL_SEARCH.name:
-        goals, cost = search_goals_assignment_local_search(map, starts, goal_positions)
+        goals, cost = search_goals_assignment_local_search(map, starts, goal_positions, args.trajectories, args.workers)
         algorithm_label = "Local search"
+    elif args.goals_assignment == GoalsAssignment.CONFLICT_AWARE.name:
+        goals, cost = search_goals_assignment_conflict_aware(map, starts, goal_positions, args.assignment_backend)
+        algorithm_label = "Conflict-aware assignment"
     elif args.goals_assignment == GoalsAssignment.RANDOM.name:
         goals, cost = get_random_goal_assignment(map, starts, goal_positions)
         algorithm_label = "Random"
@@ -173,7 +235,7 @@ def get_goals_assignment(map: list[list[bool]], starts: list[tuple[int, int]], g
     # real cost of the solution with said assignment, calculated using CBS
     real_cost = multiprocessing.Value('i', 0)
 
-    p1 = multiprocessing.Process(target=get_cbs_cost, name="Get CBS cost", args=(map, starts, goals, real_cost))
+    p1 = multiprocessing.Process(target=get_cbs_cost, name="Get CBS cost", args=(map, starts, goals, real_cost, get_goal_heuristics(map, goals)))
     p1.start()
     counter = 0
     while (counter < TIMEOUT):
@@ -195,7 +257,7 @@ def get_goals_assignment(map: list[list[bool]], starts: list[tuple[int, int]], g
     # real cost of the solution with said random assignment, calculated using CBS
     random_real_cost = multiprocessing.Value('i', 0)
 
-    p2 = multiprocessing.Process(target=get_cbs_cost, name="Get CBS cost", args=(map, starts, random_goals, random_real_cost))
+    p2 = multiprocessing.Process(target=get_cbs_cost, name="Get CBS cost", args=(map, starts, random_goals, random_real_cost, get_goal_heuristics(map, random_goals)))
     p2.start()
     counter = 0
     while (counter < TIMEOUT):
@@ -214,8 +276,7 @@ def get_goals_assignment(map: list[list[bool]], starts: list[tuple[int, int]], g
     return goals
 
 def solve_instance(file: str, args: list) -> None:
-    file_name_sections = file.split("\\")
-    file_id = file_name_sections[-1].split(".")[0]
+    file_id = get_instance_id(file)
     path = "./outputs/" + file_id + ".txt"
     if (args.save_output):
         print("Solving " + file)
@@ -231,18 +292,47 @@ def solve_instance(file: str, args: list) -> None:
     map, starts, _ = import_mapf_instance(file)
     print_mapf_instance(map, starts)
 
-    if (args.connectivity_graph):
-        print("*** Generate connectivity graph ***\n")
-        connectivity_graph = generate_connectivity_graph(map, args)
+    if (args.connectivity_graph and args.lazy_connectivity_graph):
+        # nodes' adjacency lists are computed only when goals generation needs them
+        print("*** Generate connectivity graph on demand ***\n")
+        connectivity_graph = LazyConnectivityGraph(map, args.connection_criterion, args.connection_distance)
+    elif (args.connectivity_graph):
+        # a graph already generated for the same map, criterion and distance is taken from the cache
+        connectivity_graph = None
+        if args.cache_size > 0:
+            connectivity_graph = get_cached_connectivity_graph(map, args.connection_criterion, args.connection_distance)
+        if connectivity_graph is not None:
+            print("*** Load connectivity graph from cache ***\n")
+        else:
+            print("*** Generate connectivity graph ***\n")
+            connectivity_graph = generate_connectivity_graph(map, args)
+            if args.cache_size > 0:
+                cache_connectivity_graph(connectivity_graph, map, args.connection_criterion, args.connection_distance, args.cache_size)
         print_connectivity_graph(connectivity_graph)
     else:
         print("*** Import connectivity graph from file ***\n")
-        cg_path = "./connectivity_graphs/" + file_id + ".txt"
-        connectivity_graph = import_connectivity_graph(cg_path)
+        # binary files are preferred, they are loaded without parsing, unless the text file is newer
+        bin_path = "./connectivity_graphs/" + file_id + ".bin"
+        txt_path = "./connectivity_graphs/" + file_id + ".txt"
+        connectivity_graph = None
+        if is_binary_connectivity_graph_current(bin_path, txt_path):
+            connectivity_graph = import_connectivity_graph_binary(bin_path)
+        elif os.path.isfile(txt_path):
+            connectivity_graph = import_connectivity_graph(txt_path)
+        elif args.cache_size > 0:
+            # the instance may have been renamed or duplicated, its map could be in the cache
+            connectivity_graph = get_cached_connectivity_graph(map, args.connection_criterion, args.connection_distance)
+        if connectivity_graph is None:
+            connectivity_graph = import_connectivity_graph(txt_path)
     print()
 
     print("*** Find goal positions ***\n")
-    goal_positions = get_goal_positions(map, starts, connectivity_graph, args)
+    goal_positions = get_goal_positions(map, starts, connectivity_graph, args, file_id)
+    if goal_positions == []:
+        print("*** Goals search budget exceeded, instance skipped ***\n")
+        sys.stdout = sys.__stdout__
+        sys.stderr = sys.__stderr__
+        return
     print_goal_positions(goal_positions)
     print()
 
@@ -254,9 +344,15 @@ def solve_instance(file: str, args: list) -> None:
     print("*** Problem ready to be solved ***\n")
     print_mapf_instance(map, starts, goals)
 
+    if (args.verbose):
+        # distance fields are shared by goals choice, goals assignment and CBS heuristics,
+        # and by the consecutive instances with the same map, which share the counts as well
+        stats = get_distance_fields_cache_stats()
+        print("Distance fields cache (since the map was loaded): " + str(stats['hits']) + " hits, " + str(stats['misses']) + " misses, " + str(stats['fields']) + " fields ({:.2f} MB)\n".format(stats['size'] / (1024 * 1024)))
+
     if (args.solve):
         print("***Run CBS***")
-        cbs = CBSSolver(map, starts, goals)
+        cbs = CBSSolver(map, starts, goals, get_goal_heuristics(map, goals))
         paths = cbs.find_solution(False)
         print()
         
@@ -270,24 +366,49 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Solve a MAPF agent meeting problem')
     parser.add_argument('--instance', type=str, default=None, required=True,
                         help='The name of the instance file(s)')
-    parser.add_argument('--goals_choice', type=str, default=GoalsChoice.INFORMED_GENERATION.name, choices=[GoalsChoice.UNINFORMED_GENERATION.name, GoalsChoice.INFORMED_GENERATION.name],
+    parser.add_argument('--goals_choice', type=str, default=GoalsChoice.INFORMED_GENERATION.name, choices=[GoalsChoice.UNINFORMED_GENERATION.name, GoalsChoice.INFORMED_GENERATION.name, GoalsChoice.PATH_INFORMED_GENERATION.name, GoalsChoice.OPTIMAL_GENERATION.name, GoalsChoice.INDEXED_GENERATION.name],
                         help='The algorithm to use to select the goal nodes, defaults to ' + GoalsChoice.INFORMED_GENERATION.name)
-    parser.add_argument('--goals_assignment', type=str, default=GoalsAssignment.HUNGARIAN.name, choices=[GoalsAssignment.HUNGARIAN.name, GoalsAssignment.LOCAL_SEARCH.name, GoalsAssignment.RANDOM.name],
+    parser.add_argument('--clique_cost', type=str, default=CliqueCost.MAX.name, choices=[CliqueCost.MAX.name, CliqueCost.SUM.name],
+                        help='How the costs of the nodes of a clique are combined, when using ' + GoalsChoice.OPTIMAL_GENERATION.name + ' or ' + GoalsChoice.INDEXED_GENERATION.name + ', defaults to ' + CliqueCost.MAX.name)
+    parser.add_argument('--time_limit', type=float, default=0,
+                        help='The maximum time (s) spent searching the goal nodes, the best goal nodes found so far are used when it is exceeded, 0 means no limit, defaults to ' + str(0))
+    parser.add_argument('--max_expansions', type=int, default=0,
+                        help='The maximum number of partial cliques expanded while searching the goal nodes, 0 means no limit, defaults to ' + str(0))
+    parser.add_argument('--workers', type=int, default=1,
+                        help='The number of processes used to search the goal nodes, and to run the local search trajectories, defaults to ' + str(1))
+    parser.add_argument('--window_size', type=int, default=0,
+                        help='The side (in cells) of the window around the agents where goal nodes are searched first, doubled until a clique is found inside it, 0 searches the whole map, defaults to ' + str(0))
+    parser.add_argument('--goals_assignment', type=str, default=GoalsAssignment.HUNGARIAN.name, choices=[GoalsAssignment.HUNGARIAN.name, GoalsAssignment.LOCAL_SEARCH.name, GoalsAssignment.RANDOM.name, GoalsAssignment.CONFLICT_AWARE.name],
                         help='The algorithm to use to assign each goal to an agent, defaults to ' + GoalsAssignment.HUNGARIAN.name)
+    parser.add_argument('--trajectories', type=int, default=LOCAL_SEARCH_TRAJECTORIES,
+                        help='The number of random assignments the local search starts from, when using ' + GoalsAssignment.LOCAL_SEARCH.name + ', defaults to ' + str(LOCAL_SEARCH_TRAJECTORIES))
+    parser.add_argument('--assignment_backend', type=str, default=AssignmentBackend.JONKER_VOLGENANT.name, choices=[AssignmentBackend.JONKER_VOLGENANT.name, AssignmentBackend.MUNKRES.name],
+                        help='The solver used to find optimal agent-goal assignments, defaults to ' + AssignmentBackend.JONKER_VOLGENANT.name)
     parser.add_argument('--connectivity_graph', type=bool, default=False,
                         help='Decide if you want to generate a connectivity graph for the instance or use one already generated, defaults to ' + str(False))
+    parser.add_argument('--lazy_connectivity_graph', type=bool, default=False,
+                        help='Decide if the generated connectivity graph must compute each node only when it is needed, defaults to ' + str(False))
     parser.add_argument('--connection_criterion', type=str, default=ConnectionCriterion.PATH_LENGTH.name, choices=[ConnectionCriterion.NONE.name, ConnectionCriterion.DISTANCE.name, ConnectionCriterion.PATH_LENGTH.name],
                         help='The connection definition used to generate a connectivity graph, defaults to ' + ConnectionCriterion.PATH_LENGTH.name)
     parser.add_argument('--connection_distance', type=float, default=3,
                         help='The distance used to define a connection, when using connection criteria based on distance between nodes, defaults to ' + str(3))
+    parser.add_argument('--cache_size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help='Maximum size (MB) of the cache of generated connectivity graphs, shared with the generator, 0 disables it, defaults to ' + str(DEFAULT_CACHE_SIZE))
+    parser.add_argument('--distance_fields_cache_size', type=int, default=DEFAULT_DISTANCE_FIELDS_CACHE_SIZE,
+                        help='Maximum size (MB) of the cache of distance fields (one per start or goal cell) of the current map, defaults to ' + str(DEFAULT_DISTANCE_FIELDS_CACHE_SIZE))
     parser.add_argument('--solve', type=bool, default=False,
                         help='Decide to solve the instance using CBS or not, defaults to ' + str(False))
+    parser.add_argument('--sample_size', type=int, default=0,
+                        help='In verbose mode, the number of cliques sampled to estimate the optimality of the goals found, 0 evaluates all cliques, defaults to ' + str(0))
+    parser.add_argument('--time_budget', type=float, default=0,
+                        help='In verbose mode, the time (s) spent evaluating cliques with CBS, beyond the cliques found with uninformed and informed generation, 0 means no limit, defaults to ' + str(0))
     parser.add_argument('--save_output', type=bool, default=False,
                         help='Decide to save the output in txt files, defaults to ' + str(False))
     parser.add_argument('--verbose', type=bool, default=False,
                         help='Decide to print additional data regarding the problem instance and its solution, defaults to ' + str(False))
 
     args = parser.parse_args()
+    set_distance_fields_cache_size(args.distance_fields_cache_size)
 
     for file in sorted(glob.glob(args.instance)):
         solve_instance(file, args)
\ No newline at end of file